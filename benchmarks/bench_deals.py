@@ -0,0 +1,98 @@
+"""
+Memoria y serialización de GameDeal con catálogos grandes: bytes por juego
+(tracemalloc), armado de filas para Sheets/CSV y ordenamiento del export.
+
+    python benchmarks/bench_deals.py --deals 50000
+
+Como referencia se mide también un clon de GameDeal sin slots (un __dict__
+por instancia). Para comparar contra otra versión del script:
+
+    git show HEAD~1:xb-games-scrapper.py > /tmp/antes.py
+    python benchmarks/bench_deals.py --script /tmp/antes.py
+"""
+import argparse
+import dataclasses
+import gc
+import time
+import tracemalloc
+from operator import attrgetter
+
+from common import SCRIPT, catalog_entry, load_scraper
+
+CATEGORIES = ["top-paid", "best-rated", "most-popular", "new-and-rising", "deals"]
+
+
+def deal_args(n: int) -> list:
+    """Argumentos de n GameDeal. Categoría y método se arman con join para que cada
+    juego traiga su propia copia del string, como cuando vienen de JSON o del HTML."""
+    args = []
+    for i in range(n):
+        e = catalog_entry(i)
+        # Las ofertas de la Store son de porcentajes redondos (-20%, -50%...)
+        discount = float(round((1 - e["curr"] / e["orig"]) * 100))
+        args.append((
+            e["pid"], e["title"], e["orig"], e["curr"], discount, e["badge"],
+            f"https://www.microsoft.com/es-ar/p/juego-sintetico-{i}/{e['pid']}",
+            f"https://store-images.s-microsoft.com/image/apps.{e['pid']}.png",
+            "".join(CATEGORIES[i % len(CATEGORIES)]),
+            "".join(["card", "deep", "catalog"][i % 3]),
+        ))
+    return args
+
+
+def measure_memory(cls, args: list) -> float:
+    """Bytes por juego retenidos por la lista de instancias (incluye los strings propios)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    deals = [cls(*a) for a in args]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del deals
+    return size / len(args)
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--script", default=SCRIPT, help="versión del scraper a medir")
+    cli.add_argument("--deals", type=int, default=50_000)
+    cli.add_argument("--repeat", type=int, default=5)
+    args = cli.parse_args()
+
+    module = load_scraper(args.script)
+    GameDeal = module.GameDeal
+    DictGameDeal = dataclasses.make_dataclass("DictGameDeal", [
+        (f.name, f.type) if f.default is dataclasses.MISSING else (f.name, f.type, f.default)
+        for f in dataclasses.fields(GameDeal)
+    ])
+    raw = deal_args(args.deals)
+
+    print(f"{args.script} | {args.deals} juegos | mejor de {args.repeat}")
+    print(f"  memoria   GameDeal: {measure_memory(GameDeal, raw):7.1f} B/juego   "
+          f"(clon sin slots: {measure_memory(DictGameDeal, raw):7.1f} B/juego)")
+
+    deals = [GameDeal(*a) for a in raw]
+    per_row = best_of(args.repeat, lambda: [g.to_csv_row() for g in deals])
+    print(f"  filas     to_csv_row: {per_row / len(deals) * 1e9:6.0f} ns/juego")
+    if hasattr(GameDeal, "to_rows"):
+        batched = best_of(args.repeat, lambda: GameDeal.to_rows(deals))
+        assert GameDeal.to_rows(deals) == [g.to_csv_row() for g in deals]
+        print(f"  filas     to_rows:    {batched / len(deals) * 1e9:6.0f} ns/juego")
+
+    by_lambda = best_of(args.repeat, lambda: sorted(deals, key=lambda x: (x.discount_percentage, x.title), reverse=True))
+    by_getter = best_of(args.repeat, lambda: sorted(deals, key=attrgetter("discount_percentage", "title"), reverse=True))
+    print(f"  ordenar   lambda: {by_lambda * 1e3:6.1f} ms   attrgetter: {by_getter * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark end-to-end: levanta benchmarks/mock_store.py en otro proceso, apunta el
+scraper ahí (STORE_ORIGIN/CATALOG_ORIGIN, sin caches) y mide MicrosoftStoreScraper.run
+completo: juegos/seg, requests servidos por tipo (deep fetches incluidos), costo de
+parseo por tarjeta y pico de memoria (tracemalloc, en una corrida aparte).
+
+    python benchmarks/bench_e2e.py --products 2000 --latency 20 --throttle 0.02
+    python benchmarks/bench_e2e.py --engine async --parser lxml --source catalog
+
+Para comparar contra otra versión del script (desde la que tiene STORE_ORIGIN):
+
+    git show HEAD~1:xb-games-scrapper.py > /tmp/antes.py
+    python benchmarks/bench_e2e.py --script /tmp/antes.py
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+
+from common import SCRIPT, load_scraper
+
+CATEGORIES = ["top-paid", "best-rated", "most-popular", "new-and-rising", "deals"]
+
+
+@contextlib.contextmanager
+def mock_store(args):
+    """Corre el mock en un subproceso (así no entra en la memoria medida) y devuelve su origen."""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_store.py"),
+               "--port", "0", "--products", str(args.products), "--game-pass", str(args.game_pass),
+               "--latency", str(args.latency), "--throttle", str(args.throttle), "--seed", str(args.seed)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        yield server.stdout.readline().split()[-1]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def server_stats(origin: str, reset: bool = False) -> dict:
+    with urllib.request.urlopen(f"{origin}/__reset" if reset else f"{origin}/__stats") as r:
+        return json.load(r)
+
+
+class ParseTimer:
+    """Tiempo de iter_cards (árbol de la página) y de parse_card del backend, solo lo que corre en este proceso."""
+
+    def __init__(self, backend):
+        self.reset()
+        iter_cards, parse_card = backend.iter_cards, backend.parse_card
+
+        def timed_iter_cards(html):
+            start = time.perf_counter()
+            cards = iter_cards(html)
+            self.tree_seconds += time.perf_counter() - start
+            self.listed += len(cards)
+            return cards
+
+        def timed_parse_card(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return parse_card(*args, **kwargs)
+            finally:
+                self.parse_seconds += time.perf_counter() - start
+                self.parsed += 1
+
+        backend.iter_cards = staticmethod(timed_iter_cards)
+        backend.parse_card = staticmethod(timed_parse_card)
+
+    def reset(self):
+        self.tree_seconds = self.parse_seconds = 0.0
+        self.listed = self.parsed = 0
+
+
+def run_once(module, args, origin: str):
+    """Una corrida completa; devuelve (scraper, segundos, requests servidos, ritmo final del limiter)."""
+    server_stats(origin, reset=True)
+    scraper_class = module.AsyncMicrosoftStoreScraper if args.engine == "async" else module.MicrosoftStoreScraper
+    http = module.HttpClient()
+    scraper = scraper_class(CATEGORIES[:args.categories], http=http, parser_backend=args.parser,
+                            data_source=args.source, parse_workers=args.parse_workers)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.run()
+    elapsed = time.perf_counter() - start
+    rate = max((limiter.rate for limiter in getattr(http, "limiters", {}).values()), default=None)
+    http.close()
+    return scraper, elapsed, server_stats(origin), rate
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--script", default=SCRIPT, help="versión del scraper a medir")
+    cli.add_argument("--products", type=int, default=1000, help="tamaño del catálogo del mock")
+    cli.add_argument("--game-pass", type=float, default=0.2, help="proporción de tarjetas Game Pass")
+    cli.add_argument("--latency", type=float, default=10.0, help="demora por request del mock, en ms")
+    cli.add_argument("--throttle", type=float, default=0.0, help="proporción de 429 inyectados")
+    cli.add_argument("--seed", type=int, default=0)
+    cli.add_argument("--categories", type=int, default=len(CATEGORIES))
+    cli.add_argument("--engine", choices=["sync", "async"], default="sync")
+    cli.add_argument("--parser", default="bs4")
+    cli.add_argument("--source", default="html")
+    cli.add_argument("--parse-workers", type=int, default=0)
+    cli.add_argument("--batch-lookup", action="store_true",
+                     help="precios Game Pass por lotes en el catálogo antes que la ficha (DEEP_BATCH_LOOKUP=1)")
+    cli.add_argument("--rate", type=float, default=0.0, help="requests/seg iniciales por host (HTTP_RATE, 0 = sin límite)")
+    cli.add_argument("--max-rate", type=float, default=200.0, help="techo del ritmo adaptativo (HTTP_RATE_MAX)")
+    cli.add_argument("--repeat", type=int, default=3)
+    cli.add_argument("--no-memory", action="store_true", help="saltear la corrida con tracemalloc")
+    args = cli.parse_args()
+
+    with mock_store(args) as origin:
+        # Los módulos leen la configuración al importarse
+        os.environ.update(STORE_ORIGIN=origin, CATALOG_ORIGIN=origin, HTTP_CACHE_PATH="", PRICE_CACHE_PATH="",
+                          CHANGE_DETECTION="0", DEEP_BATCH_LOOKUP="1" if args.batch_lookup else "0",
+                          HTTP_RATE=str(args.rate), HTTP_RATE_MAX=str(args.max_rate))
+        module = load_scraper(args.script)
+        timer = ParseTimer(module.get_parser_backend(args.parser))
+
+        best = None
+        for _ in range(args.repeat):
+            timer.reset()
+            scraper, elapsed, stats, rate = run_once(module, args, origin)
+            if best is None or elapsed < best[1]:
+                best = (scraper, elapsed, stats, rate, vars(timer).copy())
+        scraper, elapsed, stats, rate, parse = best
+
+        print(f"{args.script} | {args.products} productos x {args.categories} categorías | "
+              f"{args.engine}/{args.parser}/{args.source} | latencia {args.latency:g} ms, 429 {args.throttle:.0%} | "
+              f"mejor de {args.repeat}")
+        print(f"  corrida   {elapsed:7.2f} s   {len(scraper.games) / elapsed:8.1f} juegos/s   "
+              f"({len(scraper.games)} juegos)")
+        print(f"  requests  listados: {stats.get('listing', 0)}   fichas (deep): {stats.get('product', 0)}   "
+              f"catálogo: {stats.get('catalog', 0)}   429: {stats.get('429', 0)}")
+        if rate is not None:
+            print(f"  ritmo     {args.rate:g} -> {rate:.1f} req/s al terminar (AIMD)")
+        if parse["parsed"]:
+            print(f"  parseo    árbol: {parse['tree_seconds'] / parse['listed'] * 1e6:7.1f} µs/tarjeta listada ({parse['listed']})   "
+                  f"parse_card: {parse['parse_seconds'] / parse['parsed'] * 1e6:7.1f} µs/tarjeta nueva ({parse['parsed']})")
+        else:
+            print("  parseo    en los procesos de parseo (no medido acá)")
+
+        if not args.no_memory:
+            tracemalloc.start()
+            run_once(module, args, origin)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  memoria   pico {peak / 2 ** 20:7.1f} MiB (tracemalloc)")
+
+
+if __name__ == "__main__":
+    main()
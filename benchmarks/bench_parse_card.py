@@ -0,0 +1,89 @@
+"""
+Microbenchmark del costo de parseo por tarjeta, por backend, sobre un listado
+sintético de 90 tarjetas (sin red: las tarjetas Game Pass quedan encoladas).
+
+    python benchmarks/bench_parse_card.py
+
+Para comparar antes/después de un cambio, correrlo contra otra versión del script:
+
+    git show HEAD~1:xb-games-scrapper.py > /tmp/antes.py
+    python benchmarks/bench_parse_card.py --script /tmp/antes.py
+
+Con --workers N mide además páginas/seg de la etapa de parseo en N procesos
+(parse_listing_page) contra parsear todo en el proceso principal.
+"""
+import argparse
+import os
+import time
+
+from common import SCRIPT, load_scraper, synthetic_listing
+
+
+class NullDeepPool:
+    def submit(self, game):
+        pass
+
+
+def bench_backend(backend, html: str, repeat: int) -> tuple[float, float, int]:
+    """Devuelve (µs/tarjeta sólo parse_card, µs/tarjeta incluyendo armar el árbol, tarjetas)."""
+    best_parse = best_total = float("inf")
+    cards = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cards = backend.iter_cards(html)
+        built = time.perf_counter()
+        for card in cards:
+            backend.parse_card(card, "bench", NullDeepPool())
+        end = time.perf_counter()
+        best_parse = min(best_parse, end - built)
+        best_total = min(best_total, end - start)
+    n = max(len(cards), 1)
+    return best_parse / n * 1e6, best_total / n * 1e6, len(cards)
+
+
+def bench_pool(module, html: str, pages: int, workers: int, backend: str) -> tuple[float, float]:
+    """Páginas/seg parseando `pages` páginas en línea y con el pool de procesos."""
+    start = time.perf_counter()
+    for _ in range(pages):
+        module.parse_listing_page(html, "bench", backend=backend)
+    inline = pages / (time.perf_counter() - start)
+
+    pool = module.start_parse_pool(workers)
+    try:
+        start = time.perf_counter()
+        futures = [pool.submit(module.parse_listing_page, html, "bench", backend=backend) for _ in range(pages)]
+        for future in futures:
+            future.result()
+        pooled = pages / (time.perf_counter() - start)
+    finally:
+        pool.shutdown()
+    return inline, pooled
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--script", default=SCRIPT, help="versión del scraper a medir")
+    cli.add_argument("--cards", type=int, default=90)
+    cli.add_argument("--repeat", type=int, default=20)
+    cli.add_argument("--workers", type=int, default=0, help="procesos de parseo a medir (0 = no medir)")
+    cli.add_argument("--pages", type=int, default=40)
+    args = cli.parse_args()
+
+    module = load_scraper(args.script)
+    html = synthetic_listing(args.cards)
+    backends = getattr(module, "PARSER_BACKENDS", {"bs4": module.GameParser})
+
+    print(f"{args.script} | {args.cards} tarjetas | mejor de {args.repeat}")
+    for name, backend in backends.items():
+        parse_us, total_us, n = bench_backend(backend, html, args.repeat)
+        print(f"  {name:5s} parse_card: {parse_us:8.1f} µs/tarjeta   con árbol: {total_us:8.1f} µs/tarjeta   ({n} tarjetas)")
+
+    if args.workers and hasattr(module, "parse_listing_page"):
+        print(f"  etapa de parseo, {args.pages} páginas ({os.cpu_count()} núcleos):")
+        for name in backends:
+            inline, pooled = bench_pool(module, html, args.pages, args.workers, name)
+            print(f"  {name:5s} en línea: {inline:7.1f} pág/s   {args.workers} procesos: {pooled:7.1f} pág/s")
+
+
+if __name__ == "__main__":
+    main()
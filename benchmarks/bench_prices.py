@@ -0,0 +1,87 @@
+"""
+Microbenchmark de GameParser.clean_price sobre textos de precio como los de las
+tarjetas (pocos valores distintos que se repiten mucho) y sobre textos todos
+distintos, más chequeos de propiedades de PriceParser en todas las regiones.
+
+    python benchmarks/bench_prices.py
+
+Para comparar antes/después de un cambio, correrlo contra otra versión del script
+(los chequeos de PriceParser se saltean si esa versión no lo tiene):
+
+    git show HEAD~1:xb-games-scrapper.py > /tmp/antes.py
+    python benchmarks/bench_prices.py --script /tmp/antes.py
+"""
+import argparse
+import random
+import time
+
+from common import PRICE_FORMATS, SCRIPT, format_price, load_scraper
+
+
+def price_texts(n: int, distinct: int, seed: int = 0) -> list:
+    """n textos de precio es-ar tomados de `distinct` valores posibles."""
+    rng = random.Random(seed)
+    points = [rng.randrange(50_000, 9_000_000) for _ in range(distinct)]
+    return [format_price(rng.choice(points)) for _ in range(n)]
+
+
+def best_of(repeat: int, fn, texts: list, setup=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e9
+
+
+def check_properties(module, trials: int, seed: int = 0):
+    """Formatear y volver a parsear da el mismo precio, en todas las regiones y variantes."""
+    PriceParser, GameParser = module.PriceParser, module.GameParser
+    rng = random.Random(seed)
+    for region in PRICE_FORMATS:
+        settings = module.get_region(region)
+        for _ in range(trials):
+            cents = rng.choice([rng.randrange(0, 100_000), rng.randrange(0, 10 ** 11)])
+            decimals = rng.random() < 0.8
+            expected = cents if decimals else cents // 100 * 100
+            text = format_price(cents, region, decimals)
+            text = rng.choice(["", "Desde ", "  "]) + text + rng.choice(["", "+", " *"])
+            assert PriceParser.cents(text, region) == expected, (region, text, expected)
+            assert str(PriceParser.decimal(text, region)) == f"{expected // 100}.{expected % 100:02d}", text
+            assert GameParser.clean_price(text, settings) == expected / 100, text
+        for word in settings.free_words + ("free",):
+            assert PriceParser.cents(f"  {word.upper()}+", region) == 0, (region, word)
+        for text in ("", "Incluido+", "Game Pass", "ARS$"):
+            assert PriceParser.cents(text, region) is None, (region, text)
+            assert GameParser.clean_price(text, settings) == 0.0
+    print(f"  propiedades OK ({trials} precios por región, {len(PRICE_FORMATS)} regiones)")
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--script", default=SCRIPT, help="versión del scraper a medir")
+    cli.add_argument("--texts", type=int, default=50_000)
+    cli.add_argument("--distinct", type=int, default=300, help="valores de precio distintos en el listado")
+    cli.add_argument("--repeat", type=int, default=5)
+    cli.add_argument("--trials", type=int, default=2_000, help="precios por región en los chequeos")
+    args = cli.parse_args()
+
+    module = load_scraper(args.script)
+    clean_price = module.GameParser.clean_price
+    repeated = price_texts(args.texts, args.distinct)
+    unique = price_texts(args.texts, args.texts, seed=1)
+    cache = getattr(module, "PriceParser", None)
+    clear = cache.cents.cache_clear if cache else None
+
+    print(f"{args.script} | {args.texts} textos | mejor de {args.repeat}")
+    print(f"  clean_price, {args.distinct} valores repetidos: {best_of(args.repeat, clean_price, repeated, clear):6.0f} ns/precio")
+    print(f"  clean_price, todos distintos:          {best_of(args.repeat, clean_price, unique, clear):6.0f} ns/precio")
+    if cache:
+        check_properties(module, args.trials)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Utilidades compartidas por los benchmarks: carga del script del scraper
+(tiene guiones en el nombre, no se puede importar directo) y HTML sintético
+con la misma estructura que los listados y fichas de la Microsoft Store.
+"""
+import importlib.util
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, "xb-games-scrapper.py")
+
+
+def load_scraper(path: str = SCRIPT, name: str = "xb_scraper"):
+    """Importa el script del scraper como módulo."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def format_ars(value: float) -> str:
+    """1234.5 -> 'ARS$ 1.234,50'"""
+    txt = f"{value:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"ARS$ {txt}"
+
+
+# Símbolo y separadores (miles, decimal) de cada región de la Store
+PRICE_FORMATS = {
+    "es-ar": ("ARS$ ", ".", ","),
+    "es-mx": ("$", ",", "."),
+    "en-us": ("$", ",", "."),
+    "pt-br": ("R$ ", ".", ","),
+}
+
+
+def format_price(cents: int, region: str = "es-ar", decimals: bool = True) -> str:
+    """123450 -> 'ARS$ 1.234,50' (o '$1,234.50' en en-us)."""
+    symbol, thousands, decimal_sep = PRICE_FORMATS[region]
+    units, frac = divmod(cents, 100)
+    txt = f"{units:,}".replace(",", thousands)
+    if decimals:
+        txt += f"{decimal_sep}{frac:02d}"
+    return f"{symbol}{txt}"
+
+
+def card_html(pid: str, title: str, kind: str = "paid", orig: float = 0.0, curr: float = 0.0,
+              badge: str = "", href_prefix: str = "/es-ar/p") -> str:
+    """Una tarjeta <li> del listado. kind: 'paid', 'gamepass' o 'free'."""
+    if kind == "gamepass":
+        price = ('<p aria-hidden="true"><span class="font-weight-semibold">Incluido<sup>+</sup></span></p>'
+                 '<span class="badge bg-gray">Game Pass</span>')
+    elif kind == "free":
+        price = '<p aria-hidden="true"><span class="font-weight-semibold">Gratis</span></p>'
+    else:
+        orig_html = f'<span class="text-line-through">{format_ars(orig)}</span> ' if orig > curr else ""
+        price = f'<p aria-hidden="true">{orig_html}<span class="font-weight-semibold">{format_ars(curr)}</span></p>'
+    badge_html = f'<span class="badge bg-yellow text-dark">{badge}</span>' if badge else ""
+    slug = title.lower().replace(" ", "-")
+    return (
+        f'<li class="col mb-4 px-2"><div class="card material-card h-100" data-bi-pid="{pid}" data-bi-prdname="{title}">'
+        f'<img class="card-img" src="https://store-images.s-microsoft.com/image/apps.{pid}.png?w=180&h=270"/>'
+        f'<div class="card-body"><h3 class="base"><a href="{href_prefix}/{slug}/{pid}">{title}</a></h3>'
+        f'{badge_html}{price}</div></div></li>'
+    )
+
+
+def listing_page(cards: list, total: int = None, skip: int = 0) -> str:
+    """Página de listado; la página 0 incluye el texto 'Mostrando 1 - N de TOTAL'."""
+    status = ""
+    if total is not None:
+        status = (f'<div id="status-container-1" class="text-muted">Mostrando {skip + 1} - {skip + len(cards)} '
+                  f'de {total} resultados</div>')
+    return f'<html><head><title>Juegos</title></head><body>{status}<ul class="row">{"".join(cards)}</ul></body></html>'
+
+
+def product_page(orig: float, curr: float) -> str:
+    """Ficha de producto con el botón de compra (clases hasheadas y aria-label)."""
+    return (
+        '<html><body><div class="ProductActionsPanel">'
+        f'<button aria-label="Comprar, Precio original: {format_ars(orig)}; en oferta por {format_ars(curr)}">'
+        f'<span class="Price-module__brandOriginalPrice___x1Ab">{format_ars(orig)}</span>'
+        f'<span class="AcquisitionButtons-module__listedPrice___PS6Zm">{format_ars(curr)}</span>'
+        '</button></div></body></html>'
+    )
+
+
+def catalog_entry(index: int, game_pass_ratio: float = 0.2, free_ratio: float = 0.1, seed: int = 0) -> dict:
+    """Datos deterministas de un producto sintético (mismo índice -> mismo producto)."""
+    rng = random.Random(seed * 1_000_003 + index)
+    roll = rng.random()
+    kind = "gamepass" if roll < game_pass_ratio else "free" if roll < game_pass_ratio + free_ratio else "paid"
+    orig = round(rng.uniform(2_000, 90_000), 2)
+    discounted = rng.random() < 0.4
+    curr = round(orig * rng.uniform(0.3, 0.9), 2) if discounted else orig
+    return {
+        "pid": f"9N{index:06d}",
+        "title": f"Juego Sintetico {index}",
+        "kind": kind,
+        "orig": orig,
+        "curr": curr,
+        "badge": f"-{round((1 - curr / orig) * 100)}%" if discounted else "",
+    }
+
+
+def synthetic_listing(n_cards: int = 90, game_pass_ratio: float = 0.2, free_ratio: float = 0.1,
+                      seed: int = 0, total: int = None) -> str:
+    entries = [catalog_entry(i, game_pass_ratio, free_ratio, seed) for i in range(n_cards)]
+    cards = [card_html(e["pid"], e["title"], e["kind"], e["orig"], e["curr"], e["badge"]) for e in entries]
+    return listing_page(cards, total=total if total is not None else n_cards)
@@ -0,0 +1,152 @@
+"""
+Servidor HTTP local que imita a la Microsoft Store para los benchmarks end-to-end:
+listados /{region}/store/{filter_mode}/games/pc?skipItems=N (de a 90 tarjetas),
+fichas de producto /{region}/p/{slug}/{pid} y el Display Catalog
+/v7.0/products?bigIds=... Tamaño del catálogo, proporción de Game Pass, latencia
+y 429 inyectados son configurables.
+
+    python benchmarks/mock_store.py --port 8765 --products 2000 --latency 30 --throttle 0.02
+    STORE_ORIGIN=http://127.0.0.1:8765 CATALOG_ORIGIN=http://127.0.0.1:8765 SINKS=jsonl python xb-games-scrapper.py
+
+GET /__stats devuelve en JSON los requests servidos por tipo y /__reset los pone en cero.
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from common import card_html, catalog_entry, listing_page, product_page
+
+PAGE_SIZE = 90
+LISTING_RE = re.compile(r"^/([\w-]+)/store/([^/]+)/games/pc$")
+PRODUCT_RE = re.compile(r"^/([\w-]+)/p/[^/]+/(\w+)$")
+
+
+def catalog_product(entry: dict) -> dict:
+    """Producto del Display Catalog con una única disponibilidad comprable."""
+    list_price = 0.0 if entry["kind"] == "free" else entry["curr"]
+    return {
+        "ProductId": entry["pid"],
+        "LocalizedProperties": [{
+            "ProductTitle": entry["title"],
+            "Images": [{"ImagePurpose": "Poster", "Uri": f"//store-images.s-microsoft.com/image/apps.{entry['pid']}.png"}],
+        }],
+        "DisplaySkuAvailabilities": [{"Sku": {}, "Availabilities": [{
+            "Actions": ["Details", "Purchase"],
+            "OrderManagementData": {"Price": {"ListPrice": list_price, "MSRP": entry["orig"], "CurrencyCode": "ARS"}},
+        }]}],
+    }
+
+
+class MockStore(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, products: int = 1000, game_pass_ratio: float = 0.2, free_ratio: float = 0.1,
+                 latency: float = 0.0, throttle: float = 0.0, retry_after: int = 0, seed: int = 0):
+        super().__init__(address, MockStoreHandler)
+        self.entries = [catalog_entry(i, game_pass_ratio, free_ratio, seed) for i in range(products)]
+        self.by_pid = {entry["pid"]: entry for entry in self.entries}
+        self.latency = latency
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = collections.Counter()
+
+    def category_entries(self, category: str) -> list:
+        """Cada categoría lista todo el catálogo, rotado para que se solapen como en la Store."""
+        offset = zlib.crc32(category.encode()) % max(len(self.entries), 1)
+        return self.entries[offset:] + self.entries[:offset]
+
+    def count(self, kind: str) -> bool:
+        """Cuenta el request; True si hay que responderlo con un 429."""
+        with self.lock:
+            throttled = self.rng.random() < self.throttle
+            self.stats["429" if throttled else kind] += 1
+        return throttled
+
+
+class MockStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        store = self.server
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            return self.reply(200, json.dumps(store.stats).encode(), "application/json")
+        if url.path == "/__reset":
+            store.stats.clear()
+            return self.reply(200, b"{}", "application/json")
+
+        time.sleep(store.latency)
+        if match := LISTING_RE.match(url.path):
+            if store.count("listing"):
+                return self.throttled()
+            region, category = match.groups()
+            skip = int(parse_qs(url.query).get("skipItems", ["0"])[0])
+            entries = store.category_entries(category)
+            cards = [card_html(e["pid"], e["title"], e["kind"], e["orig"], e["curr"], e["badge"], f"/{region}/p")
+                     for e in entries[skip:skip + PAGE_SIZE]]
+            body = listing_page(cards, total=len(entries) if skip == 0 else None, skip=skip)
+            return self.reply(200, body.encode())
+        if match := PRODUCT_RE.match(url.path):
+            entry = store.by_pid.get(match.group(2))
+            if entry is None:
+                return self.reply(404, b"")
+            if store.count("product"):
+                return self.throttled()
+            return self.reply(200, product_page(entry["orig"], entry["curr"]).encode())
+        if url.path == "/v7.0/products":
+            if store.count("catalog"):
+                return self.throttled()
+            ids = parse_qs(url.query).get("bigIds", [""])[0].split(",")
+            products = [catalog_product(store.by_pid[pid]) for pid in ids if pid in store.by_pid]
+            return self.reply(200, json.dumps({"Products": products}).encode(), "application/json")
+        self.reply(404, b"")
+
+    def throttled(self):
+        headers = {"Retry-After": str(self.server.retry_after)} if self.server.retry_after else {}
+        self.reply(429, b"", headers=headers)
+
+    def reply(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8", headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cli.add_argument("--port", type=int, default=8765, help="0 = cualquiera libre (se informa al arrancar)")
+    cli.add_argument("--products", type=int, default=1000, help="tamaño del catálogo")
+    cli.add_argument("--game-pass", type=float, default=0.2, help="proporción de tarjetas Game Pass (van a deep fetch)")
+    cli.add_argument("--free", type=float, default=0.1, help="proporción de juegos gratis")
+    cli.add_argument("--latency", type=float, default=0.0, help="demora por request, en ms")
+    cli.add_argument("--throttle", type=float, default=0.0, help="proporción de requests respondidos con 429")
+    cli.add_argument("--retry-after", type=int, default=0, help="Retry-After de los 429, en segundos (0 = sin header)")
+    cli.add_argument("--seed", type=int, default=0)
+    args = cli.parse_args()
+
+    server = MockStore(("127.0.0.1", args.port), args.products, args.game_pass, args.free,
+                       args.latency / 1000, args.throttle, args.retry_after, args.seed)
+    print(f"Mock Store escuchando en http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
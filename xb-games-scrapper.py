@@ -1,12 +1,35 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
 import re
+import sys
 import time
-from dataclasses import dataclass
-from typing import Optional, List
+import threading
+import asyncio
+import hashlib
+import sqlite3
+import zlib
+import gzip
+import queue
+import csv
+import glob
+import multiprocessing
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from dataclasses import dataclass, asdict, fields
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Optional, List, Tuple, Iterator, Sequence, Dict
 from urllib.parse import urlparse
 import json
 import os
+import argparse
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime
@@ -16,6 +39,93 @@ SPREADSHEET_ID = "11hC5cJWSJEgl9G2sITMUyS6ohiLbU80_No3JBfqVwAI"
 SHEET_NAME = "xb"
 META_SHEET = "_meta"
 
+# HTTP: conexiones keep-alive por host, reintentos ante 429/5xx y timeout (seg)
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", "1.0"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+# Ritmo adaptativo (AIMD) por host, compartido por listados, fichas y catálogo: arranca en HTTP_RATE
+# requests/seg, sube de a HTTP_RATE_STEP por segundo mientras las respuestas vienen bien (hasta
+# HTTP_RATE_MAX) y baja a la mitad ante 429/503 o respuestas más lentas que HTTP_SLOW_SECONDS,
+# respetando Retry-After. HTTP_RATE=0 desactiva el límite
+HTTP_RATE = float(os.environ.get("HTTP_RATE", "4.0"))
+HTTP_RATE_MIN = float(os.environ.get("HTTP_RATE_MIN", "0.5"))
+HTTP_RATE_MAX = float(os.environ.get("HTTP_RATE_MAX", "20"))
+HTTP_RATE_STEP = float(os.environ.get("HTTP_RATE_STEP", "0.5"))
+HTTP_SLOW_SECONDS = float(os.environ.get("HTTP_SLOW_SECONDS", "5"))
+
+# Grabación/reproducción de respuestas: "record" guarda cada respuesta en HTTP_ARCHIVE_PATH y
+# "replay" corre todo sin red sirviendo lo grabado (404 si falta). En ambos modos los caches
+# HTTP y de precios arrancan desactivados para que cada request pase por el archivo
+HTTP_ARCHIVE_MODE = os.environ.get("HTTP_ARCHIVE_MODE", "")
+HTTP_ARCHIVE_PATH = os.environ.get("HTTP_ARCHIVE_PATH", "fixtures/http_archive")
+# Fixtures de --verify-parsers/--verify-catalog: los commiteados (listado sintético de
+# benchmarks/common.py y catálogo con .expected.json) o respuestas reales de --capture-fixtures
+FIXTURES_DIR = os.environ.get("FIXTURES_DIR", "fixtures")
+
+# Cache HTTP en disco (vacío = desactivado). Los TTL son segundos en los que se sirve
+# sin red; pasado el TTL se revalida con ETag/Last-Modified (304 = no se re-descarga)
+HTTP_CACHE_PATH = os.environ.get("HTTP_CACHE_PATH", "" if HTTP_ARCHIVE_MODE else ".cache/http_cache.sqlite")
+HTTP_CACHE_MAX_MB = int(os.environ.get("HTTP_CACHE_MAX_MB", "200"))
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+LISTING_CACHE_TTL = int(os.environ.get("LISTING_CACHE_TTL", "0"))
+DEEP_CACHE_TTL = int(os.environ.get("DEEP_CACHE_TTL", "3600"))
+
+# Deep scraping: fichas de producto consultadas a la vez (el ritmo lo regula HTTP_RATE)
+DEEP_CONCURRENCY = int(os.environ.get("DEEP_CONCURRENCY", "4"))
+# Precios deep ya resueltos, por product_id, reutilizados entre corridas (vacío = desactivado)
+PRICE_CACHE_PATH = os.environ.get("PRICE_CACHE_PATH", "" if HTTP_ARCHIVE_MODE else ".cache/deep_prices.json")
+PRICE_CACHE_TTL = int(os.environ.get("PRICE_CACHE_TTL", str(3 * 3600)))
+# Precios Game Pass por lotes de IDs contra el catálogo; las fichas solo se scrapean si el lote no los trae.
+# Apagado por defecto hasta validar la regla de precios de CatalogParser contra respuestas reales grabadas
+DEEP_BATCH_LOOKUP = os.environ.get("DEEP_BATCH_LOOKUP", "0") == "1"
+
+# Origen de la Store y del Display Catalog (para apuntar a un mock local, ver benchmarks/mock_store.py)
+STORE_ORIGIN = os.environ.get("STORE_ORIGIN", "https://www.microsoft.com").rstrip("/")
+CATALOG_ORIGIN = os.environ.get("CATALOG_ORIGIN", "https://displaycatalog.mp.microsoft.com").rstrip("/")
+
+# Regiones de la Store a scrapear en la misma corrida, separadas por coma (ver REGION_SETTINGS)
+DEFAULT_REGION = "es-ar"
+REGIONS = os.environ.get("REGIONS", DEFAULT_REGION)
+
+# Listados: Microsoft pagina de a 90 tarjetas (parámetro skipItems)
+PAGE_SIZE = 90
+# Parser de tarjetas: "bs4" (BeautifulSoup + html.parser) o "lxml" (XPath, mucho más rápido)
+PARSER_BACKEND = os.environ.get("PARSER_BACKEND", "bs4")
+# Procesos que parsean las páginas de listado mientras los threads siguen descargando
+# (0 = se parsea en el mismo thread; para usar todos los núcleos, os.cpu_count())
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", "0"))
+# Fuente de precios: "html" (tarjetas + deep scraping) o "catalog" (JSON del Display Catalog por lotes de IDs)
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "html")
+CATALOG_BATCH_SIZE = int(os.environ.get("CATALOG_BATCH_SIZE", "20"))
+CATALOG_CONCURRENCY = int(os.environ.get("CATALOG_CONCURRENCY", "4"))
+# Motor de scraping: "sync" (categoría por categoría) o "async" (todas las categorías a la vez)
+SCRAPER_ENGINE = os.environ.get("SCRAPER_ENGINE", "sync")
+# Listados: páginas simultáneas (por host en el motor async)
+LISTING_CONCURRENCY = int(os.environ.get("LISTING_CONCURRENCY", "4"))
+
+# Exportación en streaming: destinos separados por coma ("sheets", "jsonl", "csv", "sqlite",
+# "snapshots"). En streaming el historial de SNAPSHOT_PATH solo se graba si está "snapshots".
+# Vacío = modo clásico (todo en memoria y export_to_sheet al final)
+SINKS = os.environ.get("SINKS", "")
+SINK_DIR = os.environ.get("SINK_DIR", "output")
+# Cada sink escribe una tanda cada N juegos o cada T segundos, lo que llegue primero
+SINK_FLUSH_ROWS = int(os.environ.get("SINK_FLUSH_ROWS", "200"))
+SINK_FLUSH_SECONDS = float(os.environ.get("SINK_FLUSH_SECONDS", "30"))
+# Historial local de precios: cada corrida agrega un snapshot (vacío = desactivado)
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", ".cache/snapshots.sqlite")
+# Detección de cambios: las tarjetas cuyo hash no cambió desde la corrida anterior reutilizan
+# el GameDeal guardado en SNAPSHOT_PATH. Los precios deep/catálogo no están en la tarjeta, así
+# que esos se reutilizan solo por CARD_REUSE_TTL segundos
+CHANGE_DETECTION = os.environ.get("CHANGE_DETECTION", "0") == "1"
+CARD_REUSE_TTL = int(os.environ.get("CARD_REUSE_TTL", str(PRICE_CACHE_TTL)))
+# Juegos listos que pueden esperar al consumidor antes de frenar al scraper
+STREAM_BUFFER = int(os.environ.get("STREAM_BUFFER", "1000"))
+# Métricas de la corrida (tiempo por etapa, contadores, latencias HTTP) en JSON y, opcional, en formato
+# de texto de Prometheus (p. ej. para el textfile collector de node_exporter). Vacío = no se escribe
+METRICS_PATH = os.environ.get("METRICS_PATH", os.path.join(SINK_DIR, "metrics.json"))
+METRICS_PROM_PATH = os.environ.get("METRICS_PROM_PATH", "")
+
 def get_gsheet_client():
     if "GOOGLE_CREDENTIALS" in os.environ:
         creds_info = json.loads(os.environ["GOOGLE_CREDENTIALS"])
@@ -37,7 +147,7 @@ def get_gsheet_client():
     return gspread.authorize(creds)
 
 # --- 1. Definición del Objeto de Datos ---
-@dataclass
+@dataclass(slots=True)
 class GameDeal:
     product_id: str
     title: str
@@ -48,7 +158,15 @@ class GameDeal:
     url: str
     image_url: str
     category_scraped: str   
-    scrape_method: str # 'card' o 'deep' para saber de dónde salió el precio
+    scrape_method: str # 'card', 'deep' o 'catalog' para saber de dónde salió el precio
+    region: str = DEFAULT_REGION  # tienda de la que salió el precio (es-ar, en-us...)
+
+    # Con slots no hay __dict__ por instancia; categoría, método y región se repiten
+    # en miles de juegos, así que se internan para compartir una sola copia
+    def __post_init__(self):
+        self.category_scraped = sys.intern(self.category_scraped)
+        self.scrape_method = sys.intern(self.scrape_method)
+        self.region = sys.intern(self.region)
 
     def to_csv_row(self):
         return [
@@ -62,33 +180,740 @@ class GameDeal:
             self.category_scraped,
             self.url,
             self.image_url,
-            self.scrape_method
+            self.scrape_method,
+            self.region
         ]
 
-# --- 2. Lógica de Parsing ---
+    @staticmethod
+    def to_rows(games) -> List[list]:
+        """
+        to_csv_row de muchos juegos de una vez, sin una llamada por juego. El
+        formateo del descuento es lo más caro de cada fila y los porcentajes se
+        repiten mucho, así que se formatea una vez por valor.
+        """
+        labels = {}
+        rows = []
+        append = rows.append
+        for g in games:
+            discount = g.discount_percentage
+            if discount > 0:
+                label = labels.get(discount)
+                if label is None:
+                    label = labels[discount] = f"{discount:.2f}%"
+                append([g.product_id, g.title, g.original_price, g.current_price, label, g.offer_text, "SÍ",
+                        g.category_scraped, g.url, g.image_url, g.scrape_method, g.region])
+            else:
+                append([g.product_id, g.title, g.original_price, g.current_price, "", g.offer_text, "NO",
+                        g.category_scraped, g.url, g.image_url, g.scrape_method, g.region])
+        return rows
+
+@dataclass(frozen=True)
+class Region:
+    """
+    Lo que cambia entre tiendas: segmento de la URL, mercado e idioma del
+    catálogo, separador decimal de los precios y los textos que se buscan en
+    tarjetas y fichas ("Gratis", "Incluido", el botón de compra...).
+    """
+    code: str                        # segmento de la URL: /es-ar/store/...
+    market: str                      # market= del Display Catalog
+    language: str                    # languages= del Display Catalog
+    currency: str
+    decimal_sep: str                 # "," -> 1.234,56 / "." -> 1,234.56
+    free_words: Tuple[str, ...]      # en minúsculas
+    included_words: Tuple[str, ...]  # "Incluido con Game Pass", en minúsculas
+    total_re: re.Pattern             # total de "Mostrando 1 - 90 de N"
+    buy_button_re: re.Pattern        # aria-label del botón de compra en la ficha
+    aria_prices_re: re.Pattern       # precios dentro de ese aria-label
+
+    @property
+    def headers(self) -> dict:
+        """Headers por request de esta tienda (listados, fichas y catálogo)."""
+        return {"Accept-Language": f"{self.language},{self.language.split('-')[0]};q=0.9"}
+
+
+REGION_SETTINGS: Dict[str, Region] = {r.code: r for r in (
+    Region("es-ar", "AR", "es-AR", "ARS", ",", ("gratis",), ("incluido",),
+           re.compile(r'de\s+([\d.]+)'), re.compile(r'Comprar.*Precio original', re.IGNORECASE),
+           re.compile(r'ARS\$\s?[\d.,]+')),
+    Region("es-mx", "MX", "es-MX", "MXN", ".", ("gratis",), ("incluido",),
+           re.compile(r'de\s+([\d,]+)'), re.compile(r'Comprar.*Precio original', re.IGNORECASE),
+           re.compile(r'(?:MXN\s?)?\$\s?[\d.,]+')),
+    Region("en-us", "US", "en-US", "USD", ".", ("free",), ("included",),
+           re.compile(r'of\s+([\d,]+)'), re.compile(r'Buy.*Original price', re.IGNORECASE),
+           re.compile(r'\$\s?[\d.,]+')),
+    Region("pt-br", "BR", "pt-BR", "BRL", ",", ("gratuito", "grátis"), ("incluído", "incluido"),
+           re.compile(r'de\s+([\d.]+)'), re.compile(r'Comprar.*Preço original', re.IGNORECASE),
+           re.compile(r'R\$\s?[\d.,]+')),
+)}
+
+
+def get_region(code: str = DEFAULT_REGION) -> Region:
+    if code not in REGION_SETTINGS:
+        raise ValueError(f"Región desconocida: {code} (opciones: {', '.join(REGION_SETTINGS)})")
+    return REGION_SETTINGS[code]
+
+# --- 2. Cliente HTTP compartido ---
+class AdaptiveRateLimiter:
+    """
+    Token bucket thread-safe con ritmo AIMD, uno por host: cada respuesta sana suma
+    step/rate al ritmo (~step req/s más por segundo, hasta max_rate); un 429/503 lo
+    divide por 2 y una respuesta lenta lo multiplica por 0.8 (como mucho una baja por
+    segundo, para que una ráfaga de 429 cuente como un solo aviso). `pause` frena a
+    todos los que esperan turno hasta que pase el Retry-After.
+    """
+    DECREASE = 0.5
+    SLOW_DECREASE = 0.8
+
+    def __init__(self, rate: float = HTTP_RATE, min_rate: float = HTTP_RATE_MIN, max_rate: float = HTTP_RATE_MAX,
+                 step: float = HTTP_RATE_STEP, slow_seconds: float = HTTP_SLOW_SECONDS):
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate, rate)
+        self.step = step
+        self.slow_seconds = slow_seconds
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_response(self, status_code: int, seconds: float):
+        """Ajusta el ritmo según cómo respondió el servidor a un request."""
+        with self.lock:
+            if status_code in (429, 503):
+                self._decrease(self.DECREASE)
+            elif seconds > self.slow_seconds:
+                self._decrease(self.SLOW_DECREASE)
+            elif status_code < 500:
+                self.rate = min(self.max_rate, self.rate + self.step / self.rate)
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self.last_decrease >= 1.0:
+            self.rate = max(self.min_rate, self.rate * factor)
+            self.last_decrease = now
+
+
+class HttpCache:
+    """
+    Cache HTTP persistente en SQLite. Guarda el cuerpo (comprimido) junto con
+    ETag/Last-Modified, indexado por URL + headers que cambian la respuesta.
+    Las entradas viejas (max_age) y las menos usadas por encima de max_bytes se desalojan.
+    """
+    VARY_HEADERS = ("Accept-Language",)
+
+    def __init__(self, path: str = HTTP_CACHE_PATH, max_bytes: int = HTTP_CACHE_MAX_MB * 1024 * 1024,
+                 max_age: int = HTTP_CACHE_MAX_AGE):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                body BLOB,
+                encoding TEXT,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL,
+                accessed_at REAL,
+                size INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self.conn.commit()
+        self.evict()
+
+    def key(self, url: str, headers) -> str:
+        vary = "|".join(headers.get(h, "") for h in self.VARY_HEADERS)
+        return hashlib.sha1(f"{url}|{vary}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT url, body, encoding, content_type, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if not row:
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+        url, body, encoding, content_type, etag, last_modified, stored_at = row
+        return {
+            "url": url, "body": zlib.decompress(body), "encoding": encoding, "content_type": content_type,
+            "etag": etag, "last_modified": last_modified, "stored_at": stored_at,
+        }
+
+    def store(self, key: str, response: requests.Response):
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, body, response.encoding, response.headers.get("Content-Type"),
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body))
+            )
+            self.conn.commit()
+
+    def touch(self, key: str):
+        """La respuesta se revalidó (304): vuelve a contar el TTL desde ahora."""
+        with self.lock:
+            self.conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+
+    def evict(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.max_age,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # LRU: borramos las menos accedidas hasta quedar debajo del límite
+                excess = total - self.max_bytes
+                for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+                    if excess <= 0:
+                        break
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    excess -= size
+            self.conn.commit()
+
+    def close(self):
+        self.evict()
+        with self.lock:
+            self.conn.close()
+
+
+class Metrics:
+    """
+    Instrumentación de la corrida, compartida por todos los threads (y regiones):
+    segundos acumulados por etapa, contadores y un histograma de latencias de los
+    requests que salieron a la red. Los tiempos de etapas que corren en paralelo
+    se suman entre threads, así que pueden superar la duración de la corrida.
+    """
+    # Límites superiores (segundos) de los buckets del histograma de latencias
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages = Counter()       # etapa -> segundos
+        self.stage_calls = Counter()  # etapa -> veces medida
+        self.counters = Counter()
+        self.latency_buckets = [0] * (len(self.LATENCY_BUCKETS) + 1)  # el último es +Inf
+        self.latency_sum = 0.0
+        self.gauges = {}  # nombre -> {host: valor}
+
+    def inc(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def set_gauge(self, name: str, value: float, host: str = ""):
+        with self.lock:
+            self.gauges.setdefault(name, {})[host] = value
+
+    def add_time(self, stage: str, seconds: float):
+        with self.lock:
+            self.stages[stage] += seconds
+            self.stage_calls[stage] += 1
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def observe_request(self, seconds: float):
+        """Un request a la red: cuenta como etapa 'http' y entra en el histograma."""
+        bucket = next((i for i, bound in enumerate(self.LATENCY_BUCKETS) if seconds <= bound), len(self.LATENCY_BUCKETS))
+        with self.lock:
+            self.stages["http"] += seconds
+            self.stage_calls["http"] += 1
+            self.latency_buckets[bucket] += 1
+            self.latency_sum += seconds
+
+    def pop(self) -> dict:
+        """Etapas y contadores juntados hasta ahora, y los pone en cero (ver parse_page_in_worker)."""
+        with self.lock:
+            delta = {"stages": dict(self.stages), "stage_calls": dict(self.stage_calls), "counters": dict(self.counters)}
+            self.stages.clear()
+            self.stage_calls.clear()
+            self.counters.clear()
+        return delta
+
+    def merge(self, delta: dict):
+        with self.lock:
+            self.stages.update(delta["stages"])
+            self.stage_calls.update(delta["stage_calls"])
+            self.counters.update(delta["counters"])
+
+    def report(self) -> dict:
+        with self.lock:
+            bounds = [str(bound) for bound in self.LATENCY_BUCKETS] + ["+Inf"]
+            return {
+                "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                "duration_seconds": round(time.time() - self.started_at, 3),
+                "stages": {stage: {"seconds": round(seconds, 3), "calls": self.stage_calls[stage]}
+                           for stage, seconds in sorted(self.stages.items(), key=lambda item: -item[1])},
+                "counters": dict(sorted(self.counters.items())),
+                "gauges": {name: dict(values) for name, values in self.gauges.items()},
+                "http_latency": {
+                    "count": sum(self.latency_buckets),
+                    "sum_seconds": round(self.latency_sum, 3),
+                    "buckets": dict(zip(bounds, self.latency_buckets)),
+                },
+            }
+
+    def to_prometheus(self, prefix: str = "xb_scraper") -> str:
+        report = self.report()
+        lines = [
+            f"# TYPE {prefix}_run_duration_seconds gauge",
+            f"{prefix}_run_duration_seconds {report['duration_seconds']}",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{stage}"}} {entry["seconds"]}'
+                  for stage, entry in report["stages"].items()]
+        for name, value in report["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        for name, values in report["gauges"].items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines += [f'{prefix}_{name}{{host="{host}"}} {value}' for host, value in values.items()]
+        latency = report["http_latency"]
+        lines.append(f"# TYPE {prefix}_http_request_duration_seconds histogram")
+        cumulative = 0
+        for bound, count in latency["buckets"].items():
+            cumulative += count
+            lines.append(f'{prefix}_http_request_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines += [f"{prefix}_http_request_duration_seconds_sum {latency['sum_seconds']}",
+                  f"{prefix}_http_request_duration_seconds_count {latency['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str = METRICS_PATH, prom_path: str = METRICS_PROM_PATH):
+        for target, content in ((path, lambda: json.dumps(self.report(), indent=2, ensure_ascii=False)),
+                                (prom_path, self.to_prometheus)):
+            if not target:
+                continue
+            if os.path.dirname(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(content())
+        report = self.report()
+        top = ", ".join(f"{stage} {entry['seconds']:.1f}s" for stage, entry in list(report["stages"].items())[:4])
+        print(f"\n>>> ⏱ Métricas ({report['duration_seconds']:.1f}s): {top} -> {path or prom_path or 'sin archivo'}")
+
+
+_metrics: Optional[Metrics] = None
+
+def get_metrics() -> Metrics:
+    """Métricas compartidas de la corrida (se crean la primera vez que se piden)."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+class HttpArchive:
+    """
+    Respuestas grabadas en disco para correr el pipeline sin red: un archivo gzip por
+    URL (nombre = hash de la URL) con una línea JSON de metadata y después el cuerpo.
+    Lo escribe RecordingAdapter y lo sirve ReplayAdapter.
+    """
+    # Los cuerpos se guardan ya descomprimidos y enteros
+    SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+
+    def __init__(self, path: str = HTTP_ARCHIVE_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def file(self, url: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(url.encode()).hexdigest()[:32] + ".gz")
+
+    def store(self, url: str, response: requests.Response):
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "encoding": response.encoding,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in self.SKIP_HEADERS},
+        }
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n" + response.content
+        # mtime=0: grabar dos veces lo mismo da el mismo archivo; el rename evita archivos a medias
+        path = self.file(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(data, mtime=0))
+        os.replace(tmp, path)
+
+    def load(self, url: str) -> Optional[Tuple[dict, bytes]]:
+        try:
+            with open(self.file(url), "rb") as f:
+                data = gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        meta, _, body = data.partition(b"\n")
+        return json.loads(meta), body
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adapter de red normal que además graba cada respuesta definitiva (salvo 429/5xx) en el HttpArchive."""
+
+    def __init__(self, archive: HttpArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code != 429 and response.status_code < 500:
+            self.archive.store(request.url, response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Sirve las respuestas del HttpArchive sin tocar la red; lo que no se grabó vuelve como 404."""
+
+    def __init__(self, archive: HttpArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        r = requests.Response()
+        r.request = request
+        r.url = request.url
+        r._content_consumed = True
+        entry = self.archive.load(request.url)
+        if entry is None:
+            r.status_code, r.reason, r._content = 404, "Not in archive", b""
+            return r
+        meta, r._content = entry
+        r.status_code = meta["status"]
+        r.reason = meta["reason"]
+        r.encoding = meta["encoding"]
+        r.headers = CaseInsensitiveDict(meta["headers"])
+        r.from_archive = True
+        return r
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """
+    Una sola requests.Session para listados y deep fetches: reutiliza conexiones
+    (keep-alive), pide respuestas comprimidas y reintenta con backoff ante 5xx. El
+    ritmo de cada host lo lleva un AdaptiveRateLimiter; los 429/503 se reintentan
+    acá (no en urllib3) para que el limiter se entere y respete el Retry-After.
+    Con un HttpCache, las respuestas se sirven/revalidan desde disco. Con un
+    HttpArchive, se graban ("record") o se sirven sin red ("replay").
+    """
+    DEFAULT_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        # Por defecto la tienda de DEFAULT_REGION; cada request de una región manda su Region.headers
+        "Accept-Language": "es-AR,es;q=0.9",
+        # gzip/deflate siempre; br se agrega solo si está instalado brotli
+        "Accept-Encoding": requests.utils.DEFAULT_ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+    }
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, retries: int = HTTP_RETRIES,
+                 backoff: float = HTTP_BACKOFF, timeout: float = HTTP_TIMEOUT, cache: Optional[HttpCache] = None,
+                 archive: Optional[HttpArchive] = None, archive_mode: str = HTTP_ARCHIVE_MODE,
+                 rate: float = HTTP_RATE):
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        # En replay no hay servidor que cuidar: los rate limits no aplican
+        self.replay = archive is not None and archive_mode == "replay"
+        self.rate = 0.0 if self.replay else rate
+        self.limiters = {}  # host -> AdaptiveRateLimiter
+        self.limiters_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update(self.DEFAULT_HEADERS)
+
+        retry = self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        if self.replay:
+            adapter = ReplayAdapter(archive)
+        elif archive is not None and archive_mode == "record":
+            adapter = RecordingAdapter(archive, pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        elif archive is not None:
+            raise ValueError(f"HTTP_ARCHIVE_MODE desconocido: {archive_mode} (opciones: record, replay)")
+        else:
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, cache_ttl: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET con la sesión compartida. `cache_ttl` (segundos) habilita el cache en disco
+        para este request; el rate limit del host solo se consume si se sale a la red.
+        Los `headers` del request pisan los de la sesión (y entran en la clave del cache).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cache is None or cache_ttl is None:
+            return self._send(url, **kwargs)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        key = self.cache.key(url, {**self.session.headers, **headers})
+        entry = self.cache.get(key)
+        if entry and time.time() - entry["stored_at"] < cache_ttl:
+            get_metrics().inc("http_cache_hits")
+            return self._cached_response(entry)
+
+        # Request condicional: si no cambió, el server responde 304 sin cuerpo
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        r = self._send(url, headers=headers, **kwargs)
+        if r.status_code == 304 and entry:
+            get_metrics().inc("http_not_modified")
+            self.cache.touch(key)
+            return self._cached_response(entry)
+        if r.status_code == 200:
+            self.cache.store(key, r)
+        return r
+
+    def limiter(self, url: str) -> Optional[AdaptiveRateLimiter]:
+        if self.rate <= 0:
+            return None
+        host = urlparse(url).netloc
+        with self.limiters_lock:
+            if host not in self.limiters:
+                self.limiters[host] = AdaptiveRateLimiter(self.rate)
+            return self.limiters[host]
+
+    def _send(self, url: str, **kwargs) -> requests.Response:
+        """
+        El request a la red, al ritmo del host. Un 429/503 baja el ritmo, frena al host
+        por el Retry-After (o el backoff exponencial si no viene) y se reintenta.
+        Latencias, reintentos y errores quedan en las métricas.
+        """
+        metrics = get_metrics()
+        limiter = self.limiter(url)
+        attempt = 0
+        while True:
+            if limiter:
+                with metrics.timer("rate_limit_wait"):
+                    limiter.acquire()
+            start = time.perf_counter()
+            try:
+                r = self.session.get(url, **kwargs)
+            except Exception:
+                metrics.inc("http_failures")
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                metrics.observe_request(elapsed)
+            metrics.inc("http_requests")
+            # urllib3 deja en la respuesta el historial de reintentos (5xx) que hizo antes
+            retries = getattr(r.raw, "retries", None)
+            if retries is not None and retries.history:
+                metrics.inc("http_retries", len(retries.history))
+            if limiter:
+                limiter.on_response(r.status_code, elapsed)
+            if r.status_code not in (429, 503) or attempt >= self.retries:
+                break
+            metrics.inc("http_throttled")
+            metrics.inc("http_retries")
+            wait = self._retry_after(r)
+            if wait is None:
+                wait = self.backoff * 2 ** attempt
+            print(f"        ⚠ {r.status_code} de {urlparse(url).netloc}: reintento en {wait:.1f}s"
+                  + (f" (ritmo {limiter.rate:.1f} req/s)" if limiter else ""))
+            if limiter:
+                limiter.pause(wait)
+            else:
+                time.sleep(wait)
+            attempt += 1
+        if r.status_code >= 400:
+            metrics.inc("http_errors")
+        return r
+
+    def _retry_after(self, r: requests.Response) -> Optional[float]:
+        """Segundos del header Retry-After (número o fecha HTTP); None si no viene o no se entiende."""
+        value = r.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return self.retry.parse_retry_after(value)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _cached_response(entry: dict) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.url = entry["url"]
+        r._content = entry["body"]
+        r.encoding = entry["encoding"]
+        r.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"] or "text/html"})
+        r.from_cache = True
+        return r
+
+    def close(self):
+        # El ritmo al que terminó cada host es lo que ese servidor tolera hoy
+        for host, limiter in self.limiters.items():
+            get_metrics().set_gauge("http_rate", round(limiter.rate, 2), host=host)
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+
+_http_client: Optional[HttpClient] = None
+
+def get_http_client() -> HttpClient:
+    """Cliente compartido por defecto (se crea la primera vez que se pide)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient(cache=HttpCache(HTTP_CACHE_PATH) if HTTP_CACHE_PATH else None,
+                                  archive=HttpArchive(HTTP_ARCHIVE_PATH) if HTTP_ARCHIVE_MODE else None)
+    return _http_client
+
+# --- 3. Lógica de Parsing ---
+def _xpath_class(name: str) -> str:
+    """Condición XPath equivalente a class_='name' de BeautifulSoup (un token dentro de @class)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class Selectors:
+    """
+    Registro central de selectores y regex, compilados una sola vez y compartidos por
+    todos los caminos de parseo. Si Microsoft rehashea las clases CSS, se cambian acá.
+    """
+    # --- Listado: tarjetas ---
+    CARD_ITEM = "col mb-4 px-2"                  # <li> de cada tarjeta (match exacto del atributo)
+    CARD_MARKER = f'class="{CARD_ITEM}"'         # para contar tarjetas sobre el HTML crudo
+    CARD = "card"                                # <div> con data-bi-pid
+    TITLE_H3 = "base"
+    CARD_BODY = "card-body"
+    CARD_IMG = "card-img"
+    YELLOW_BADGE = "bg-yellow"                   # substring dentro del class (badge de oferta)
+    ORIG_PRICE = "text-line-through"
+    CURR_PRICE = "font-weight-semibold"
+    GAME_PASS_RE = re.compile("Game Pass")
+
+    # --- Listado: total de resultados ("Mostrando 1 - 90 de N") ---
+    STATUS_CONTAINER_RE = re.compile(r'id="status-container-\d+"[^>]*>(.*?)</div>', re.DOTALL)
+    HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+    # --- Ficha de producto (clases hasheadas de CSS modules) ---
+    DEEP_LISTED_PRICE_RE = re.compile(r'AcquisitionButtons-module__listedPrice')
+    DEEP_ORIGINAL_PRICE_RE = re.compile(r'Price-module__.*OriginalPrice')
+    # (los textos del botón de compra dependen del idioma: ver Region)
+
+    # --- Parseo acotado: solo se materializan estas regiones del HTML ---
+    CARD_STRAINER = SoupStrainer('li', attrs={'class': CARD_ITEM})
+    DEEP_PRICE_STRAINER = SoupStrainer('span', attrs={'class': re.compile(
+        f"{DEEP_LISTED_PRICE_RE.pattern}|{DEEP_ORIGINAL_PRICE_RE.pattern}"
+    )})
+
+    # --- Precios (la regex de cada región la arma PriceParser) ---
+    NON_DIGIT_RE = re.compile(r'\D')
+
+    # --- Las mismas tarjetas como XPath precompiladas (backend lxml) ---
+    XP_CARDS = etree.XPath(f"//li[@class='{CARD_ITEM}']")
+    XP_CARD = etree.XPath(f".//div[{_xpath_class(CARD)}]")
+    XP_TITLE_H3 = etree.XPath(f".//h3[{_xpath_class(TITLE_H3)}]")
+    XP_ANCHOR = etree.XPath(".//a")
+    XP_CARD_BODY = etree.XPath(f".//div[{_xpath_class(CARD_BODY)}]")
+    XP_CARD_IMG = etree.XPath(f".//img[{_xpath_class(CARD_IMG)}]")
+    XP_YELLOW_BADGE = etree.XPath(f".//span[contains(@class, '{YELLOW_BADGE}')]")
+    XP_PRICE_CONTAINER = etree.XPath(".//p[@aria-hidden='true']")
+    XP_SPANS = etree.XPath(".//span")
+    XP_ORIG_PRICE = etree.XPath(f".//span[{_xpath_class(ORIG_PRICE)}]")
+    XP_CURR_PRICE = etree.XPath(f".//span[{_xpath_class(CURR_PRICE)}]")
+
+    @staticmethod
+    def is_yellow_badge(css_class) -> bool:
+        return bool(css_class) and Selectors.YELLOW_BADGE in css_class
+
+class PriceParser:
+    """
+    Parser de precios por región: una regex compilada toma el primer número con sus
+    separadores de miles/decimales ('ARS$ 1.234,50', '$1,234.50', 'Desde R$ 99,90+')
+    y las palabras de "gratis" se buscan antes con `in`. Los mismos textos se repiten
+    en miles de tarjetas, así que el resultado se cachea por (texto, región).
+    """
+    # region_code -> (regex del número, separador de miles, palabras de gratis)
+    _patterns: Dict[str, Tuple[re.Pattern, str, Tuple[str, ...]]] = {}
+
+    @staticmethod
+    def pattern(region_code: str) -> Tuple[re.Pattern, str, Tuple[str, ...]]:
+        entry = PriceParser._patterns.get(region_code)
+        if entry is None:
+            region = get_region(region_code)
+            thousands = "." if region.decimal_sep == "," else ","
+            number = re.compile(
+                rf"(?P<units>\d[\d{re.escape(thousands)}]*)(?:{re.escape(region.decimal_sep)}(?P<frac>\d{{1,2}}))?"
+            )
+            entry = (number, thousands, region.free_words + ("free",))
+            PriceParser._patterns[region_code] = entry
+        return entry
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def cents(text: str, region_code: str = DEFAULT_REGION) -> Optional[int]:
+        """Precio en centavos enteros; 0 si dice gratis y None si el texto no trae ningún precio."""
+        number, thousands, free_words = PriceParser.pattern(region_code)
+        lowered = text.lower()
+        for word in free_words:
+            if word in lowered:
+                return 0
+        match = number.search(text)
+        if match is None:
+            return None
+        units, frac = match.groups()
+        cents = int(units.replace(thousands, "")) * 100
+        if frac:
+            cents += int(frac) * (10 if len(frac) == 1 else 1)
+        return cents
+
+    @staticmethod
+    def decimal(text: str, region_code: str = DEFAULT_REGION) -> Optional[Decimal]:
+        cents = PriceParser.cents(text, region_code)
+        return None if cents is None else Decimal(cents).scaleb(-2)
+
+
 class GameParser:
 
     @staticmethod
-    def clean_price(price_str: str) -> float:
-        """Convierte strings como 'ARS$ 1.500,00' a float 1500.00"""
+    def clean_price(price_str: str, region: Optional[Region] = None) -> float:
+        """
+        Convierte strings como 'ARS$ 1.500,00' (o '$1,500.00' en en-us) a float 1500.00.
+        Gratis y textos sin precio dan 0.0 (para distinguirlos, usar PriceParser.cents).
+        """
         if not price_str: return 0.0
-        # Limpieza básica
-        txt = price_str.lower().replace('ars$', '').replace('$', '').replace('+', '').replace('desde', '').strip()
-        
-        # Si dice gratis, devolvemos 0 explícito
-        if "gratis" in txt or "free" in txt:
-            return 0.0
-
-        # Limpiar caracteres no numéricos excepto coma y punto
-        txt = re.sub(r'[^\d.,]', '', txt)
-        
-        # Formato Argentina: 1.000,00 -> Eliminar punto miles, reemplazar coma decimal por punto
-        txt = txt.replace('.', '').replace(',', '.')
-        
-        try:
-            return float(txt)
-        except ValueError:
-            return 0.0
+        cents = PriceParser.cents(price_str, region.code if region else DEFAULT_REGION)
+        return cents / 100 if cents else 0.0
 
     @staticmethod
     def fix_url(raw_href: str) -> str:
@@ -98,101 +923,202 @@ class GameParser:
             return raw_href
         
         # Usualmente vienen como /es-ar/p/titulo/id
-        return f"https://www.microsoft.com{raw_href}"
+        return f"{STORE_ORIGIN}{raw_href}"
 
     @staticmethod
-    def fetch_deep_price(url: str) -> tuple[float, float]:
+    def fetch_deep_price(url: str, http: Optional[HttpClient] = None,
+                         region: Optional[Region] = None) -> tuple[float, float]:
         """
         Entra a la página del producto para buscar el botón de compra
         cuando la tarjeta dice 'Incluido con Game Pass'.
         """
         print(f"        >>> 🔎 Deep Scraping: {url}")
         try:
-            time.sleep(1.0) # Espera de cortesía y carga
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept-Language": "es-AR,es;q=0.9"
-            }
-            r = requests.get(url, headers=headers)
+            r = (http or get_http_client()).get(url, cache_ttl=DEEP_CACHE_TTL, headers=(region or get_region()).headers)
             if r.status_code != 200:
                 return 0.0, 0.0
-
-            soup = BeautifulSoup(r.text, 'html.parser')
-
-            # --- ESTRATEGIA 1: Buscar por las clases hasheadas del botón ---
-            # Buscamos el contenedor de precios dentro del botón de compra
-            
-            # Precio Actual (Clase común en ambos casos provistos: AcquisitionButtons-module__listedPrice___PS6Zm)
-            curr_tag = soup.find('span', class_=re.compile(r'AcquisitionButtons-module__listedPrice'))
-            
-            # Precio Original (Puede variar: Price-module__brandOriginalPrice o Price-module__originalPrice)
-            orig_tag = soup.find('span', class_=re.compile(r'Price-module__.*OriginalPrice'))
-
-            curr_val = GameParser.clean_price(curr_tag.text) if curr_tag else 0.0
-            orig_val = GameParser.clean_price(orig_tag.text) if orig_tag else 0.0
-
-            # --- ESTRATEGIA 2: Fallback usando Aria-Label del botón ---
-            # Si falló lo anterior, buscamos el botón que contenga "Comprar" y parseamos su texto
-            if curr_val == 0.0:
-                button = soup.find('button', attrs={'aria-label': re.compile(r'Comprar.*Precio original', re.IGNORECASE)})
-                if button:
-                    aria_text = button.get('aria-label', '')
-                    # Regex para extraer: "Precio original: ARS$ 35.990,00; en oferta por ARS$ 28.792,00"
-                    precios = re.findall(r'ARS\$\s?[\d.,]+', aria_text)
-                    if len(precios) >= 2:
-                        orig_val = GameParser.clean_price(precios[0])
-                        curr_val = GameParser.clean_price(precios[1])
-                    elif len(precios) == 1:
-                        curr_val = GameParser.clean_price(precios[0])
-                        orig_val = curr_val
-
-            # Ajuste final si solo encontramos precio actual
-            if orig_val == 0.0 and curr_val > 0:
-                orig_val = curr_val
-
-            return orig_val, curr_val
+            return GameParser.parse_deep_price(r.text, region)
 
         except Exception as e:
             print(f"        ❌ Error en deep scraping: {e}")
             return 0.0, 0.0
 
     @staticmethod
-    def parse_card(card_soup, category_name) -> Optional[GameDeal]:
+    def parse_deep_price(html: str, region: Optional[Region] = None) -> tuple[float, float]:
+        """
+        Extrae (precio original, precio actual) de la ficha de producto.
+        Solo se construye el árbol de los spans de precio (y del botón si hace falta el fallback).
+        """
+        region = region or get_region()
+        soup = BeautifulSoup(html, 'html.parser', parse_only=Selectors.DEEP_PRICE_STRAINER)
+
+        # --- ESTRATEGIA 1: Buscar por las clases hasheadas del botón ---
+        # Buscamos el contenedor de precios dentro del botón de compra
+        
+        # Precio Actual (Clase común en ambos casos provistos: AcquisitionButtons-module__listedPrice___PS6Zm)
+        curr_tag = soup.find('span', class_=Selectors.DEEP_LISTED_PRICE_RE)
+        
+        # Precio Original (Puede variar: Price-module__brandOriginalPrice o Price-module__originalPrice)
+        orig_tag = soup.find('span', class_=Selectors.DEEP_ORIGINAL_PRICE_RE)
+
+        curr_val = GameParser.clean_price(curr_tag.text, region) if curr_tag else 0.0
+        orig_val = GameParser.clean_price(orig_tag.text, region) if orig_tag else 0.0
+
+        # --- ESTRATEGIA 2: Fallback usando Aria-Label del botón ---
+        # Si falló lo anterior, buscamos el botón que contenga "Comprar" y parseamos su texto
+        if curr_val == 0.0:
+            button_strainer = SoupStrainer('button', attrs={'aria-label': region.buy_button_re})
+            button_soup = BeautifulSoup(html, 'html.parser', parse_only=button_strainer)
+            button = button_soup.find('button', attrs={'aria-label': region.buy_button_re})
+            if button:
+                aria_text = button.get('aria-label', '')
+                # Regex para extraer: "Precio original: ARS$ 35.990,00; en oferta por ARS$ 28.792,00"
+                precios = region.aria_prices_re.findall(aria_text)
+                if len(precios) >= 2:
+                    orig_val = GameParser.clean_price(precios[0], region)
+                    curr_val = GameParser.clean_price(precios[1], region)
+                elif len(precios) == 1:
+                    curr_val = GameParser.clean_price(precios[0], region)
+                    orig_val = curr_val
+
+        # Ajuste final si solo encontramos precio actual
+        if orig_val == 0.0 and curr_val > 0:
+            orig_val = curr_val
+
+        return orig_val, curr_val
+
+    @staticmethod
+    def apply_prices(game: GameDeal, orig_price: float, curr_price: float) -> bool:
+        """
+        Completa precios y descuento del GameDeal.
+        Devuelve False si no se pudo obtener ningún precio (hay que descartarlo).
+        """
+        if curr_price == 0.0 and orig_price == 0.0:
+            return False
+
+        if orig_price == 0.0 and curr_price > 0:
+            orig_price = curr_price
+
+        discount_pct = 0.0
+        if orig_price > 0 and curr_price < orig_price:
+            discount_pct = ((orig_price - curr_price) / orig_price) * 100
+
+        game.original_price = orig_price
+        game.current_price = curr_price
+        game.discount_percentage = discount_pct
+        return True
+
+    @staticmethod
+    def build_deal(pid: str, title: str, final_url: str, img_url: str, offer_text: str, category_name: str,
+                   is_game_pass_card: bool, orig_text: Optional[str], curr_text: Optional[str],
+                   deep_pool=None, http: Optional[HttpClient] = None,
+                   region: Optional[Region] = None) -> Optional[GameDeal]:
+        """Parte común a todos los backends: arma el GameDeal a partir de los campos ya extraídos."""
+        region = region or get_region()
+        game = GameDeal(
+            product_id=pid,
+            title=title,
+            original_price=0.0,
+            current_price=0.0,
+            discount_percentage=0.0,
+            offer_text=offer_text,
+            url=final_url,
+            image_url=img_url,
+            category_scraped=category_name,
+            scrape_method="card",
+            region=region.code
+        )
+
+        orig_price = 0.0
+        curr_price = 0.0
+        if is_game_pass_card:
+            # >>> ACTIVAR DEEP SCRAPING <<<
+            game.scrape_method = "deep"
+            if deep_pool is not None:
+                # Se resuelve en segundo plano; el pool mergea los precios después
+                deep_pool.submit(game)
+                return game
+            orig_price, curr_price = GameParser.fetch_deep_price(final_url, http, region=region)
+        else:
+            if orig_text:
+                orig_price = GameParser.clean_price(orig_text, region)
+            if curr_text:
+                curr_price = GameParser.clean_price(curr_text, region)
+
+        # Lógica final de precios
+        if not GameParser.apply_prices(game, orig_price, curr_price):
+            return None # No pudimos sacar precio, descartar o revisar
+
+        return game
+
+    @staticmethod
+    def extract_pid(card_soup) -> Optional[str]:
+        """Lectura barata del product_id (data-bi-pid), sin parsear el resto de la tarjeta."""
+        container = card_soup.find('div', class_=Selectors.CARD)
+        return container.get('data-bi-pid') if container else None
+
+    @staticmethod
+    def extract_url(card_soup) -> str:
+        """URL normalizada del producto a partir del link del título."""
+        title_tag = card_soup.find('h3', class_=Selectors.TITLE_H3).find('a')
+        return GameParser.fix_url(title_tag['href'])
+
+    @staticmethod
+    def digest(parts: List[str]) -> str:
+        return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def card_fingerprint(card_soup) -> str:
+        """
+        Hash de todo lo que define el GameDeal de una tarjeta: sus textos (título,
+        precios, badges, marca Game Pass), el link y la imagen. Da lo mismo en
+        ambos backends, así que sobrevive a un cambio de PARSER_BACKEND.
+        """
+        parts = list(card_soup.stripped_strings)
+        parts += [a.get('href', '') for a in card_soup.find_all('a')]
+        parts += [img.get('src', '') for img in card_soup.find_all('img')]
+        return GameParser.digest(parts)
+
+    @staticmethod
+    def parse_card(card_soup, category_name, deep_pool=None, http: Optional[HttpClient] = None,
+                   region: Optional[Region] = None) -> Optional[GameDeal]:
+        """
+        Parsea una tarjeta del listado. Si es Game Pass y se pasa un `deep_pool`,
+        el deep fetch se encola y el GameDeal vuelve con precios pendientes.
+        """
+        region = region or get_region()
         try:
             # 1. Verificar si es una tarjeta de producto válida
-            pid = card_soup.find('div', class_='card').get('data-bi-pid')
+            pid = GameParser.extract_pid(card_soup)
             if not pid: return None
             
             # 2. Título y URL
-            title_tag = card_soup.find('h3', class_='base').find('a')
+            title_tag = card_soup.find('h3', class_=Selectors.TITLE_H3).find('a')
             title = title_tag.text.strip()
             raw_href = title_tag['href']
             final_url = GameParser.fix_url(raw_href)
 
             # 3. FILTRO: GRATIS
             # Buscamos en el body de la tarjeta si dice "Gratis"
-            card_body = card_soup.find('div', class_='card-body')
-            if card_body and "gratis" in card_body.get_text().lower():
+            card_body = card_soup.find('div', class_=Selectors.CARD_BODY)
+            if card_body and any(word in card_body.get_text().lower() for word in region.free_words):
                 # print(f"    - Saltando GRATIS: {title}")
+                get_metrics().inc("cards_free_skipped")
                 return None
 
             # 4. Imagen
-            img_tag = card_soup.find('img', class_='card-img')
+            img_tag = card_soup.find('img', class_=Selectors.CARD_IMG)
             img_url = img_tag['src'] if img_tag else ""
             # Limpiar query params de la imagen si se desea
             if "?" in img_url: img_url = img_url.split("?")[0]
 
             # 5. Oferta / Badge Amarillo
             offer_text = ""
-            yellow_badge = card_soup.find('span', class_=lambda x: x and 'bg-yellow' in x)
+            yellow_badge = card_soup.find('span', class_=Selectors.is_yellow_badge)
             if yellow_badge:
                 offer_text = yellow_badge.text.strip()
 
             # --- LOGICA DE PRECIOS ---
-            orig_price = 0.0
-            curr_price = 0.0
-            scrape_method = "card"
-
             # Detectar si es "Incluido con Game Pass"
             # El usuario indicó buscar: <span class="font-weight-semibold">Incluido<sup...>
             # Y el texto "Game Pass"
@@ -202,119 +1128,1388 @@ class GameParser:
             
             if price_container:
                 text_content = price_container.get_text().lower()
-                if "incluido" in text_content or "game pass" in text_content:
+                if "game pass" in text_content or any(word in text_content for word in region.included_words):
                     is_game_pass_card = True
             
             # Chequeo adicional por el badge gris de Game Pass
-            if card_soup.find('span', string=re.compile("Game Pass")):
+            if card_soup.find('span', string=Selectors.GAME_PASS_RE):
                 is_game_pass_card = True
 
-            if is_game_pass_card:
-                # >>> ACTIVAR DEEP SCRAPING <<<
-                orig_price, curr_price = GameParser.fetch_deep_price(final_url)
-                scrape_method = "deep"
-            else:
+            orig_text = curr_text = None
+            if not is_game_pass_card:
                 # >>> SCRAPING NORMAL DE TARJETA <<<
                 # Precio Original (Tachado)
-                orig_tag = card_soup.find('span', class_='text-line-through')
+                orig_tag = card_soup.find('span', class_=Selectors.ORIG_PRICE)
                 if orig_tag: 
-                    orig_price = GameParser.clean_price(orig_tag.text)
+                    orig_text = orig_tag.text
                 
                 # Precio Actual (Semibold)
-                curr_tag = card_soup.find('span', class_='font-weight-semibold')
+                curr_tag = card_soup.find('span', class_=Selectors.CURR_PRICE)
                 if curr_tag:
-                    curr_price = GameParser.clean_price(curr_tag.text)
-
-            # Lógica final de precios
-            if curr_price == 0.0 and orig_price == 0.0:
-                return None # No pudimos sacar precio, descartar o revisar
-
-            if orig_price == 0.0 and curr_price > 0:
-                orig_price = curr_price
-
-            discount_pct = 0.0
-            if orig_price > 0 and curr_price < orig_price:
-                discount_pct = ((orig_price - curr_price) / orig_price) * 100
-
-            return GameDeal(
-                product_id=pid,
-                title=title,
-                original_price=orig_price,
-                current_price=curr_price,
-                discount_percentage=discount_pct,
-                offer_text=offer_text,
-                url=final_url,
-                image_url=img_url,
-                category_scraped=category_name,
-                scrape_method=scrape_method
+                    curr_text = curr_tag.text
+
+            return GameParser.build_deal(
+                pid, title, final_url, img_url, offer_text, category_name,
+                is_game_pass_card, orig_text, curr_text, deep_pool, http, region
             )
 
         except Exception as e:
             # print(f"Error parseando item: {e}")
+            get_metrics().inc("parse_failures")
+            return None
+
+    @staticmethod
+    def iter_cards(html: str) -> list:
+        # Encontrar todas las tarjetas (li con clase col mb-4 px-2)
+        # Solo se construye el subárbol de cada <li> de tarjeta, no la página entera
+        soup = BeautifulSoup(html, 'html.parser', parse_only=Selectors.CARD_STRAINER)
+        return soup.find_all('li', class_=Selectors.CARD_ITEM)
+
+
+class LxmlCardParser:
+    """
+    Fast path de parseo de tarjetas con lxml + las XPath precompiladas de Selectors.
+    Replica exactamente la lógica de GameParser.parse_card (mismo GameDeal de salida);
+    `--verify-parsers` lo confirma sobre páginas reales grabadas con `--capture-fixtures`.
+    """
+
+    @staticmethod
+    def _first(xpath, node):
+        found = xpath(node)
+        return found[0] if found else None
+
+    @staticmethod
+    def _tag_string(node) -> Optional[str]:
+        """Equivalente a Tag.string de bs4: el texto si el tag tiene un único hijo."""
+        if len(node) == 0:
+            return node.text
+        if len(node) == 1 and not node.text and not node[0].tail:
+            return LxmlCardParser._tag_string(node[0])
+        return None
+
+    @staticmethod
+    def iter_cards(html: str) -> list:
+        return Selectors.XP_CARDS(lxml.html.document_fromstring(html))
+
+    @staticmethod
+    def extract_pid(card) -> Optional[str]:
+        container = LxmlCardParser._first(Selectors.XP_CARD, card)
+        return container.get('data-bi-pid') if container is not None else None
+
+    @staticmethod
+    def extract_url(card) -> str:
+        h3 = LxmlCardParser._first(Selectors.XP_TITLE_H3, card)
+        title_tag = LxmlCardParser._first(Selectors.XP_ANCHOR, h3)
+        return GameParser.fix_url(title_tag.get('href'))
+
+    @staticmethod
+    def card_fingerprint(card) -> str:
+        parts = [text.strip() for text in card.itertext() if text.strip()]
+        parts += [a.get('href', '') for a in card.iter('a')]
+        parts += [img.get('src', '') for img in card.iter('img')]
+        return GameParser.digest(parts)
+
+    @staticmethod
+    def parse_card(card, category_name, deep_pool=None, http: Optional[HttpClient] = None,
+                   region: Optional[Region] = None) -> Optional[GameDeal]:
+        P = LxmlCardParser
+        region = region or get_region()
+        try:
+            pid = P.extract_pid(card)
+            if not pid: return None
+
+            h3 = P._first(Selectors.XP_TITLE_H3, card)
+            title_tag = P._first(Selectors.XP_ANCHOR, h3) if h3 is not None else None
+            if title_tag is None or title_tag.get('href') is None:
+                return None
+            title = title_tag.text_content().strip()
+            final_url = GameParser.fix_url(title_tag.get('href'))
+
+            card_body = P._first(Selectors.XP_CARD_BODY, card)
+            if card_body is not None and any(word in card_body.text_content().lower() for word in region.free_words):
+                get_metrics().inc("cards_free_skipped")
+                return None
+
+            img_tag = P._first(Selectors.XP_CARD_IMG, card)
+            if img_tag is not None and img_tag.get('src') is None:
+                return None
+            img_url = img_tag.get('src') if img_tag is not None else ""
+            if "?" in img_url: img_url = img_url.split("?")[0]
+
+            yellow_badge = P._first(Selectors.XP_YELLOW_BADGE, card)
+            offer_text = yellow_badge.text_content().strip() if yellow_badge is not None else ""
+
+            is_game_pass_card = False
+            price_container = P._first(Selectors.XP_PRICE_CONTAINER, card)
+            if price_container is not None:
+                text_content = price_container.text_content().lower()
+                if "game pass" in text_content or any(word in text_content for word in region.included_words):
+                    is_game_pass_card = True
+
+            for span in Selectors.XP_SPANS(card):
+                span_string = P._tag_string(span)
+                if span_string and Selectors.GAME_PASS_RE.search(span_string):
+                    is_game_pass_card = True
+                    break
+
+            orig_text = curr_text = None
+            if not is_game_pass_card:
+                orig_tag = P._first(Selectors.XP_ORIG_PRICE, card)
+                if orig_tag is not None:
+                    orig_text = orig_tag.text_content()
+                curr_tag = P._first(Selectors.XP_CURR_PRICE, card)
+                if curr_tag is not None:
+                    curr_text = curr_tag.text_content()
+
+            return GameParser.build_deal(
+                pid, title, final_url, img_url, offer_text, category_name,
+                is_game_pass_card, orig_text, curr_text, deep_pool, http, region
+            )
+
+        except Exception as e:
+            get_metrics().inc("parse_failures")
+            return None
+
+
+PARSER_BACKENDS = {
+    "bs4": GameParser,
+    "lxml": LxmlCardParser,
+}
+
+def get_parser_backend(name: str = PARSER_BACKEND):
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Parser desconocido: {name} (opciones: {', '.join(PARSER_BACKENDS)})")
+    return PARSER_BACKENDS[name]
+
+
+class _CollectDeep:
+    """deep_pool falso: anota los GameDeal Game Pass sin salir a la red."""
+
+    def __init__(self):
+        self.games = []
+
+    def submit(self, game: GameDeal):
+        self.games.append(game)
+
+
+def verify_parser_backends(paths: List[str]) -> bool:
+    """
+    Parsea páginas de listado guardadas (archivos, o los .html de un directorio) con
+    todos los backends y compara los GameDeal resultantes contra el de referencia
+    (bs4). True si son idénticos; una página sin tarjetas, o no tener ninguna página,
+    cuenta como falla.
+    """
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            pages += sorted(glob.glob(os.path.join(path, "*.html")))
+        elif os.path.exists(path):
+            pages.append(path)
+        else:
+            print(f"⚠ {path}: no existe, se saltea")
+    if not pages:
+        print(f"❌ No hay páginas de listado en {', '.join(paths)} (se graban con --capture-fixtures)")
+        return False
+
+    all_ok = True
+    for path in pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        # listing-<región>-<categoría>.html, como los deja capture_fixtures
+        match = re.match(r"listing-([a-z]{2}-[a-z]{2})-", os.path.basename(path))
+        region = REGION_SETTINGS.get(match.group(1) if match else DEFAULT_REGION, get_region())
+        results = {}
+        fingerprints = {}
+        for name, backend in PARSER_BACKENDS.items():
+            cards = backend.iter_cards(html)
+            results[name] = [backend.parse_card(card, "fixture", _CollectDeep(), region=region) for card in cards]
+            fingerprints[name] = [backend.card_fingerprint(card) for card in cards]
+        reference = results["bs4"]
+        if not reference:
+            all_ok = False
+            print(f"❌ {path}: ninguna tarjeta (¿cambió el HTML de la Store?)")
+            continue
+        for name, deals in results.items():
+            if fingerprints[name] != fingerprints["bs4"]:
+                all_ok = False
+                print(f"❌ {path} [{name}]: los hashes de tarjeta no coinciden con bs4")
+            if deals == reference:
+                print(f"✔ {path} [{name}]: {len(deals)} tarjetas idénticas")
+                continue
+            all_ok = False
+            print(f"❌ {path} [{name}]: {len(deals)} tarjetas vs {len(reference)} en bs4")
+            for ours, ref in zip(deals, reference):
+                if ours != ref:
+                    print(f"    {name}: {ours}\n    bs4:  {ref}")
+                    break
+    return all_ok
+
+
+@dataclass(slots=True)
+class ParsedCard:
+    """Lo que vuelve de un worker de parseo por cada tarjeta de la página."""
+    product_id: Optional[str]
+    url: str
+    fingerprint: Optional[str]  # solo con detección de cambios
+    deal: Optional[GameDeal]    # Game Pass: scrape_method 'deep' y precios pendientes
+
+
+def parse_listing_page(html: str, category: str, region_code: str = DEFAULT_REGION,
+                       backend: str = PARSER_BACKEND, fingerprints: bool = False) -> List[ParsedCard]:
+    """
+    Etapa de parseo (corre en un proceso del pool, por eso es una función de módulo):
+    parsea todas las tarjetas de una página. Los Game Pass no salen a la red acá;
+    el proceso principal los encola en su DeepFetchPool.
+    """
+    parser = get_parser_backend(backend)
+    region = get_region(region_code)
+    collect = _CollectDeep()
+    parsed = []
+    with get_metrics().timer("parse"):
+        for card in parser.iter_cards(html):
+            try:
+                url = parser.extract_url(card)
+            except Exception:
+                url = ""
+            parsed.append(ParsedCard(
+                product_id=parser.extract_pid(card),
+                url=url,
+                fingerprint=parser.card_fingerprint(card) if fingerprints else None,
+                deal=parser.parse_card(card, category, collect, region=region),
+            ))
+    return parsed
+
+
+def _init_parse_worker():
+    """Cada proceso de parseo arranca con métricas propias, no con la copia heredada del fork."""
+    global _metrics
+    _metrics = Metrics()
+
+
+def parse_page_in_worker(*args) -> Tuple[List[ParsedCard], dict]:
+    """parse_listing_page en un worker del pool, junto con las métricas que juntó para sumarlas en el principal."""
+    parsed = parse_listing_page(*args)
+    return parsed, get_metrics().pop()
+
+
+class ParsedCardParser:
+    """
+    Backend para tarjetas que ya parseó parse_listing_page en otro proceso: misma
+    interfaz que GameParser, así el scraper y las fuentes de datos no cambian.
+    """
+
+    @staticmethod
+    def iter_cards(cards: List[ParsedCard]) -> List[ParsedCard]:
+        return cards
+
+    @staticmethod
+    def extract_pid(card: ParsedCard) -> Optional[str]:
+        return card.product_id
+
+    @staticmethod
+    def extract_url(card: ParsedCard) -> str:
+        if not card.url:
+            raise ValueError(f"Tarjeta sin link: {card.product_id}")
+        return card.url
+
+    @staticmethod
+    def card_fingerprint(card: ParsedCard) -> Optional[str]:
+        return card.fingerprint
+
+    @staticmethod
+    def parse_card(card: ParsedCard, category_name, deep_pool=None, http: Optional[HttpClient] = None,
+                   region: Optional[Region] = None) -> Optional[GameDeal]:
+        game = card.deal
+        if game is None or game.scrape_method != "deep":
+            return game
+        if deep_pool is not None:
+            deep_pool.submit(game)
+            return game
+        orig_price, curr_price = GameParser.fetch_deep_price(game.url, http, region=region or get_region(game.region))
+        return game if GameParser.apply_prices(game, orig_price, curr_price) else None
+
+
+def start_parse_pool(workers: int = PARSE_WORKERS) -> ProcessPoolExecutor:
+    """
+    Pool de procesos de la etapa de parseo. Con fork (Linux) los workers heredan el
+    módulo ya cargado y se lanzan todos en el primer submit, así que se arrancan acá,
+    antes que los threads de descarga.
+    """
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                               initializer=_init_parse_worker)
+    pool.submit(int).result()
+    return pool
+
+# --- 4. Fuentes de datos: HTML de tarjetas o JSON del catálogo ---
+class HtmlDataSource:
+    """Precios leídos del HTML de cada tarjeta (con deep scraping para las de Game Pass)."""
+    name = "html"
+
+    def __init__(self, parser=GameParser, region: Optional[Region] = None):
+        self.parser = parser
+        self.region = region or get_region()
+
+    def build_deals(self, cards: list, category: str, deep_pool=None) -> List[Optional[GameDeal]]:
+        with get_metrics().timer("parse"):
+            return [self.parser.parse_card(card, category, deep_pool, region=self.region) for card in cards]
+
+
+class CatalogParser:
+    """
+    Arma GameDeal a partir de los productos JSON del Display Catalog (funciones
+    puras; `--verify-catalog` las corre sobre las respuestas de fixtures/).
+    """
+    IMAGE_PURPOSES = ("Poster", "BoxArt", "Tile")
+
+    @staticmethod
+    def best_price(product: dict) -> Optional[tuple[float, float]]:
+        """
+        (MSRP, precio de lista más bajo) entre las disponibilidades comprables sin membresía.
+        None si no hay ninguna o si el JSON no tiene la forma esperada.
+        """
+        try:
+            for sku_availability in product.get("DisplaySkuAvailabilities") or []:
+                prices = []
+                for availability in sku_availability.get("Availabilities") or []:
+                    if "Purchase" not in (availability.get("Actions") or []):
+                        continue
+                    # Las que requieren remediation son descuentos para miembros (Game Pass, EA Play)
+                    if availability.get("RemediationRequired"):
+                        continue
+                    price = (availability.get("OrderManagementData") or {}).get("Price")
+                    if price and "ListPrice" in price:
+                        prices.append((float(price.get("MSRP") or price["ListPrice"]), float(price["ListPrice"])))
+                if prices:
+                    return min(prices, key=lambda p: p[1])
+            return None
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def image_url(localized: dict) -> str:
+        images = localized.get("Images", [])
+        for purpose in CatalogParser.IMAGE_PURPOSES:
+            for image in images:
+                if image.get("ImagePurpose") == purpose and image.get("Uri"):
+                    uri = image["Uri"]
+                    return f"https:{uri}" if uri.startswith("//") else uri
+        return ""
+
+    @staticmethod
+    def parse_product(product: dict, category_name: str, url: str, region: str = DEFAULT_REGION) -> Optional[GameDeal]:
+        """None si no tiene precio de compra o es gratis (igual que el filtro de tarjetas)."""
+        try:
+            prices = CatalogParser.best_price(product)
+            if not prices or prices[1] == 0.0:
+                return None
+            orig_price, curr_price = prices
+
+            localized = (product.get("LocalizedProperties") or [{}])[0]
+            game = GameDeal(
+                product_id=product["ProductId"],
+                title=localized.get("ProductTitle", "").strip(),
+                original_price=0.0,
+                current_price=0.0,
+                discount_percentage=0.0,
+                offer_text="",
+                url=url,
+                image_url=CatalogParser.image_url(localized),
+                category_scraped=category_name,
+                scrape_method="catalog",
+                region=region
+            )
+            if not GameParser.apply_prices(game, orig_price, curr_price):
+                return None
+            if game.discount_percentage > 0:
+                game.offer_text = f"-{game.discount_percentage:.0f}%"
+            return game
+        except (KeyError, TypeError, ValueError):
             return None
 
-# --- 3. Scraper Principal ---
+
+class CatalogClient:
+    """Consulta el Display Catalog de Microsoft por lotes de product IDs (varios lotes en paralelo)."""
+    CATALOG_URL = f"{CATALOG_ORIGIN}/v7.0/products"
+
+    def __init__(self, http: Optional[HttpClient] = None, batch_size: int = CATALOG_BATCH_SIZE,
+                 concurrency: int = CATALOG_CONCURRENCY, region: Optional[Region] = None):
+        self.http = http or get_http_client()
+        self.region = region or get_region()
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="catalog")
+
+    def batch_url(self, product_ids: List[str]) -> str:
+        return (f"{self.CATALOG_URL}?bigIds={','.join(product_ids)}"
+                f"&market={self.region.market}&languages={self.region.language}")
+
+    def _fetch_batch(self, product_ids: List[str]) -> List[dict]:
+        try:
+            r = self.http.get(self.batch_url(product_ids), cache_ttl=LISTING_CACHE_TTL, headers=self.region.headers)
+            if r.status_code != 200:
+                print(f"    Catálogo: error {r.status_code} para {len(product_ids)} IDs")
+                return []
+            return r.json().get("Products", [])
+        except Exception as e:
+            print(f"    Catálogo: error {e}")
+            return []
+
+    def fetch_products(self, product_ids: List[str]) -> dict:
+        """product_id -> producto JSON, para los IDs que el catálogo devolvió."""
+        batches = [product_ids[i:i + self.batch_size] for i in range(0, len(product_ids), self.batch_size)]
+        products = {}
+        for batch_products in self.executor.map(self._fetch_batch, batches):
+            for product in batch_products:
+                products[product.get("ProductId")] = product
+        return products
+
+
+class CatalogDataSource:
+    """
+    Precios del JSON del catálogo: de cada tarjeta solo se lee el ID y la URL, y los
+    datos se piden por lotes. Si un producto no viene en el JSON (o sin precio de
+    compra), esa tarjeta se resuelve con el parseo HTML de siempre.
+    """
+    name = "catalog"
+
+    def __init__(self, parser=GameParser, http: Optional[HttpClient] = None, client: Optional[CatalogClient] = None,
+                 region: Optional[Region] = None):
+        self.parser = parser
+        self.region = region or get_region()
+        self.client = client or CatalogClient(http, region=self.region)
+
+    def build_deals(self, cards: list, category: str, deep_pool=None) -> List[Optional[GameDeal]]:
+        pids = [self.parser.extract_pid(card) for card in cards]
+        with get_metrics().timer("catalog"):
+            products = self.client.fetch_products([pid for pid in pids if pid])
+        deals = []
+        with get_metrics().timer("parse"):
+            for pid, card in zip(pids, cards):
+                game = None
+                if pid in products:
+                    try:
+                        game = CatalogParser.parse_product(products[pid], category, self.parser.extract_url(card),
+                                                           self.region.code)
+                    except Exception:
+                        game = None
+                if game is None:
+                    game = self.parser.parse_card(card, category, deep_pool, region=self.region)
+                deals.append(game)
+        return deals
+
+
+def get_data_source(name: str = DATA_SOURCE, parser=GameParser, http: Optional[HttpClient] = None,
+                    region: Optional[Region] = None):
+    if name == "html":
+        return HtmlDataSource(parser, region)
+    if name == "catalog":
+        return CatalogDataSource(parser, http, region=region)
+    raise ValueError(f"Fuente de datos desconocida: {name} (opciones: html, catalog)")
+
+# --- 5. Concurrencia: pool de Deep Scraping ---
+class PriceCache:
+    """
+    Precios deep por región y product_id con TTL, persistidos en un JSON entre
+    corridas, junto con el método que los resolvió ('deep' o 'catalog'). Una
+    sola instancia puede compartirse entre regiones.
+    """
+
+    def __init__(self, path: str = PRICE_CACHE_PATH, ttl: int = PRICE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.prices = {}
+        try:
+            with open(path) as f:
+                self.prices = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def key(product_id: str, region: str) -> str:
+        return f"{region}:{product_id}"
+
+    def get(self, product_id: str, region: str = DEFAULT_REGION) -> Optional[tuple[float, float, str]]:
+        with self.lock:
+            entry = self.prices.get(self.key(product_id, region))
+        if entry and time.time() - entry["ts"] < self.ttl:
+            return entry["orig"], entry["curr"], entry["method"]
+        return None
+
+    def set(self, product_id: str, orig_price: float, curr_price: float, region: str = DEFAULT_REGION,
+            method: str = "deep"):
+        with self.lock:
+            self.prices[self.key(product_id, region)] = {"orig": orig_price, "curr": curr_price, "method": method,
+                                                         "ts": time.time()}
+
+    def save(self):
+        # Guardamos solo lo vigente para que el archivo no crezca indefinidamente
+        now = time.time()
+        with self.lock:
+            self.prices = {pid: e for pid, e in self.prices.items() if now - e["ts"] < self.ttl}
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.prices, f)
+
+
+class DeepFetchPool:
+    """
+    Resuelve los precios 'deep' de las tarjetas Game Pass con un pool acotado
+    de threads y un rate limit global, en vez de un sleep por cada request.
+    Cada product_id se consulta como mucho una vez por corrida, y antes se
+    busca en el PriceCache de corridas anteriores.
+
+    Con un CatalogClient, los IDs pendientes se juntan en lotes y se resuelven
+    con un solo request al catálogo por lote; solo los que el lote no trae
+    caen al scraping de la ficha (en paralelo, como antes).
+
+    Cada Future resuelve a (precio original, precio actual, método), con método
+    'deep' o 'catalog' según de dónde salió el precio.
+    """
+
+    def __init__(self, max_workers: int = DEEP_CONCURRENCY, http: Optional[HttpClient] = None,
+                 price_cache: Optional[PriceCache] = None, catalog: Optional[CatalogClient] = None,
+                 batch_size: int = CATALOG_BATCH_SIZE, region: Optional[Region] = None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deep")
+        self.http = http or get_http_client()
+        self.region = region or get_region()
+        self.price_cache = price_cache
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.batch: List[Tuple[str, str, Future]] = []  # (product_id, url, future) esperando lote
+        self.pending: List[Tuple[GameDeal, Future]] = []
+        self.futures = {}  # product_id -> Future (memo dentro de la corrida)
+        self.cache_hits = 0
+        self.batch_hits = 0
+
+    def submit(self, game: GameDeal):
+        future = self.futures.get(game.product_id)
+        if future is None:
+            cached = self.price_cache.get(game.product_id, self.region.code) if self.price_cache else None
+            if cached:
+                future = Future()
+                future.set_result(cached)
+                self.cache_hits += 1
+                get_metrics().inc("deep_cache_hits")
+            elif self.catalog is not None:
+                future = Future()
+                self.batch.append((game.product_id, game.url, future))
+                if len(self.batch) >= self.batch_size:
+                    self._flush_batch()
+            else:
+                future = self.executor.submit(self._fetch, game.product_id, game.url)
+            self.futures[game.product_id] = future
+        self.pending.append((game, future))
+
+    def _flush_batch(self):
+        batch, self.batch = self.batch, []
+        if batch:
+            self.executor.submit(self._resolve_batch, batch)
+
+    def _resolve_batch(self, batch: List[Tuple[str, str, Future]]):
+        """
+        Un request multi-ID al catálogo; lo que no venga con precio va a la ficha de producto.
+        Corre en el executor, donde una excepción se perdería con su Future: todo Future del
+        lote tiene que quedar resuelto o en manos de _fetch_into, si no drain(wait=True) no vuelve.
+        """
+        handed_off = set()
+        try:
+            try:
+                products = self.catalog.fetch_products([pid for pid, _, _ in batch])
+            except Exception as e:
+                print(f"        ❌ Error en lote de precios: {e}")
+                products = {}
+
+            for product_id, url, future in batch:
+                try:
+                    prices = CatalogParser.best_price(products[product_id]) if product_id in products else None
+                except Exception:
+                    prices = None  # JSON inesperado: se resuelve por la ficha
+                if prices and prices[1] > 0:
+                    self.batch_hits += 1
+                    get_metrics().inc("deep_batch_hits")
+                    if self.price_cache:
+                        self.price_cache.set(product_id, *prices, region=self.region.code, method="catalog")
+                    future.set_result((*prices, "catalog"))
+                else:
+                    try:
+                        self.executor.submit(self._fetch_into, product_id, url, future)
+                        handed_off.add(product_id)
+                    except RuntimeError:
+                        # El pool ya se cerró: no hay fallback posible
+                        future.set_result((0.0, 0.0, "deep"))
+        finally:
+            for product_id, _, future in batch:
+                if product_id not in handed_off and not future.done():
+                    future.set_result((0.0, 0.0, "deep"))
+
+    def _fetch_into(self, product_id: str, url: str, future: Future):
+        try:
+            future.set_result(self._fetch(product_id, url))
+        except Exception:
+            future.set_result((0.0, 0.0, "deep"))
+
+    def _fetch(self, product_id: str, url: str) -> tuple[float, float, str]:
+        metrics = get_metrics()
+        metrics.inc("deep_fetches")
+        with metrics.timer("deep_fetch"):
+            orig_price, curr_price = GameParser.fetch_deep_price(url, self.http, self.region)
+        if self.price_cache and (orig_price > 0 or curr_price > 0):
+            self.price_cache.set(product_id, orig_price, curr_price, self.region.code)
+        return orig_price, curr_price, "deep"
+
+    def drain(self, wait: bool = False) -> Tuple[List[GameDeal], List[GameDeal]]:
+        """
+        Mergea los precios de los deep fetch que ya terminaron (con wait=True,
+        espera a todos) y los saca de la cola.
+        Devuelve (juegos con precio, juegos sin precio para descartar).
+        """
+        if wait:
+            self._flush_batch()
+        ready, failed, still_pending = [], [], []
+        for game, future in self.pending:
+            if not wait and not future.done():
+                still_pending.append((game, future))
+                continue
+            orig_price, curr_price, game.scrape_method = future.result()
+            if GameParser.apply_prices(game, orig_price, curr_price):
+                ready.append(game)
+            else:
+                failed.append(game)
+        self.pending = still_pending
+        return ready, failed
+
+    def resolve(self) -> List[GameDeal]:
+        """
+        Espera todos los deep fetch encolados y mergea los precios en cada GameDeal.
+        Devuelve los juegos que quedaron sin precio para que se descarten.
+        """
+        return self.drain(wait=True)[1]
+
+    def shutdown(self, cancel: bool = False):
+        """
+        Cierra el pool. Con cancel=True (el consumidor cortó el stream) los deep
+        fetch encolados se cancelan en vez de esperarlos, y el lote a medio juntar
+        no se manda.
+        """
+        if not cancel:
+            self._flush_batch()
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+        if self.price_cache:
+            self.price_cache.save()
+
+# --- 6. Exportación a Google Sheets ---
+SHEET_HEADER = [
+    "ID", "Title", "Original Price", "Current Price",
+    "Discount %", "Offer Text", "Es Oferta", 
+    "Categoría", "URL", "Image URL", "Metodo", "Región"
+]
+
+def write_sheet_batch(sh, data: List[dict]):
+    """
+    Escribe los rangos de `data` y la fecha de actualización en _meta con un
+    único values.batchUpdate. Si _meta no existe, reintenta solo con los datos;
+    cualquier otro error (cuota, rango inválido, 5xx) se propaga.
+    """
+    meta = {
+        "range": f"'{META_SHEET}'!B2:B3",
+        "values": [[datetime.now().strftime("%Y-%m-%d %H:%M:%S")], [0]],
+    }
+    try:
+        sh.values_batch_update({"valueInputOption": "RAW", "data": data + [meta]})
+    except gspread.exceptions.APIError as e:
+        # Sin la hoja _meta, Sheets rechaza todo el batch con "Unable to parse range: '_meta'!B2:B3"
+        if "Unable to parse range" not in str(e) or META_SHEET not in str(e):
+            raise
+        if data:
+            sh.values_batch_update({"valueInputOption": "RAW", "data": data})
+        print(f"Nota: No se actualizó la hoja {META_SHEET} (no existe).")
+
+
+class DealSink:
+    """
+    Destino de la exportación en streaming. Junta los juegos que llegan y los
+    escribe por tandas cada `flush_rows` juegos o cada `flush_seconds` segundos
+    (se revisa al llegar cada juego). Las subclases implementan write_batch.
+    """
+    name = "sink"
+
+    def __init__(self, flush_rows: int = SINK_FLUSH_ROWS, flush_seconds: float = SINK_FLUSH_SECONDS):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.buffer: List[GameDeal] = []
+        self.last_flush = time.monotonic()
+        self.written = 0
+
+    def add(self, game: GameDeal):
+        self.buffer.append(game)
+        if len(self.buffer) >= self.flush_rows or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        batch, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if not batch:
+            return
+        metrics = get_metrics()
+        try:
+            with metrics.timer("export"):
+                self.write_batch(batch)
+            self.written += len(batch)
+            metrics.inc("rows_exported", len(batch))
+        except Exception as e:
+            # Un destino caído no frena al resto: se pierde solo esta tanda en este sink
+            metrics.inc("export_failures")
+            print(f"        ❌ Error escribiendo {len(batch)} juegos en {self.name}: {e}")
+
+    def write_batch(self, games: List[GameDeal]):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        print(f"    💾 {self.name}: {self.written} juegos exportados.")
+
+
+class JsonlSink(DealSink):
+    """Un objeto JSON por línea; cada tanda queda en disco al hacer flush."""
+    name = "jsonl"
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_batch(self, games: List[GameDeal]):
+        self.file.writelines(json.dumps(asdict(g), ensure_ascii=False) + "\n" for g in games)
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class CsvSink(DealSink):
+    """Mismas columnas que la hoja de cálculo."""
+    name = "csv"
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(SHEET_HEADER)
+
+    def write_batch(self, games: List[GameDeal]):
+        self.writer.writerows(GameDeal.to_rows(games))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+
+class SqliteSink(DealSink):
+    """Tabla `deals` con una fila por (product_id, región) de esta corrida; cada tanda es una transacción."""
+    name = "sqlite"
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.columns = [f.name for f in fields(GameDeal)]
+        self.db = sqlite3.connect(path)
+        # Como el JSONL y el CSV, el archivo refleja solo la última corrida
+        self.db.execute("DROP TABLE IF EXISTS deals")
+        self.db.execute(
+            f"CREATE TABLE deals ({', '.join(self.columns)}, PRIMARY KEY (product_id, region))"
+        )
+        self.insert = (f"INSERT OR REPLACE INTO deals ({', '.join(self.columns)}) "
+                       f"VALUES ({', '.join('?' * len(self.columns))})")
+
+    def write_batch(self, games: List[GameDeal]):
+        with self.db:
+            self.db.executemany(self.insert, [tuple(getattr(g, c) for c in self.columns) for g in games])
+
+    def close(self):
+        super().close()
+        self.db.close()
+
+
+class SheetsSink(DealSink):
+    """
+    Escribe la hoja de arriba hacia abajo en el orden en que llegan los juegos
+    (sin ordenar ni diff): cada tanda es un values.batchUpdate a continuación
+    de la anterior. Al cerrar se pisan con vacíos las filas sobrantes de la
+    corrida anterior y se actualiza _meta.
+    """
+    name = "sheets"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sh = None
+        self.next_row = 2
+        self.previous_rows = 0
+
+    def _open(self):
+        gc = get_gsheet_client()
+        if not gc:
+            raise RuntimeError("sin credenciales de Google")
+        self.sh = gc.open_by_key(SPREADSHEET_ID)
+        self.previous_rows = len(self.sh.values_get(f"'{SHEET_NAME}'!A:A").get("values", []))
+
+    def write_batch(self, games: List[GameDeal]):
+        data = []
+        if self.sh is None:
+            self._open()
+            data.append({"range": f"'{SHEET_NAME}'!A1", "values": [SHEET_HEADER]})
+        data.append({"range": f"'{SHEET_NAME}'!A{self.next_row}", "values": GameDeal.to_rows(games)})
+        self.sh.values_batch_update({"valueInputOption": "RAW", "data": data})
+        self.next_row += len(games)
+
+    def close(self):
+        super().close()
+        if self.sh is None:
+            return
+        data = []
+        stale = self.previous_rows - (self.next_row - 1)
+        if stale > 0:
+            data.append({"range": f"'{SHEET_NAME}'!A{self.next_row}",
+                         "values": [[""] * len(SHEET_HEADER)] * stale})
+        try:
+            write_sheet_batch(self.sh, data)
+        except Exception as e:
+            print(f"Error al cerrar la exportación a Sheets: {e}")
+
+
+class SnapshotStore:
+    """
+    Historial de precios en SQLite: cada corrida es un run y cada juego una fila
+    compacta en `prices` (título, URL e imagen de cada producto en cada región
+    van una sola vez a `products`). `prices` está agrupada por (product_id,
+    region, run_id), así que el historial de un producto es un rango contiguo
+    del índice.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run_id INTEGER PRIMARY KEY,
+            started_at TEXT NOT NULL,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at);
+        CREATE TABLE IF NOT EXISTS products (
+            product_id TEXT NOT NULL,
+            region TEXT NOT NULL,
+            title TEXT,
+            url TEXT,
+            image_url TEXT,
+            PRIMARY KEY (product_id, region)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS prices (
+            product_id TEXT NOT NULL,
+            region TEXT NOT NULL,
+            run_id INTEGER NOT NULL REFERENCES runs (run_id),
+            original_price REAL,
+            current_price REAL,
+            discount_percentage REAL,
+            offer_text TEXT,
+            category_scraped TEXT,
+            scrape_method TEXT,
+            PRIMARY KEY (product_id, region, run_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_prices_run ON prices (run_id);
+        CREATE TABLE IF NOT EXISTS cards (
+            product_id TEXT NOT NULL,
+            region TEXT NOT NULL,
+            card_hash TEXT NOT NULL,
+            parsed_at REAL NOT NULL,
+            deal TEXT NOT NULL,
+            PRIMARY KEY (product_id, region)
+        );
+    """
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def start_run(self) -> int:
+        with self.db:
+            return self.db.execute("INSERT INTO runs (started_at) VALUES (?)", (self._now(),)).lastrowid
+
+    def append(self, run_id: int, games: List[GameDeal]):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)",
+                [(g.product_id, g.region, g.title, g.url, g.image_url) for g in games],
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(g.product_id, g.region, run_id, g.original_price, g.current_price, g.discount_percentage,
+                  g.offer_text, g.category_scraped, g.scrape_method) for g in games],
+            )
+
+    def finish_run(self, run_id: int):
+        with self.db:
+            self.db.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (self._now(), run_id))
+
+    def record_run(self, games: List[GameDeal]) -> int:
+        run_id = self.start_run()
+        self.append(run_id, games)
+        self.finish_run(run_id)
+        return run_id
+
+    def last_runs(self, run_id: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+        """(run pedido o último terminado, run terminado anterior a ese)."""
+        if run_id is None:
+            row = self.db.execute("SELECT MAX(run_id) FROM runs WHERE finished_at IS NOT NULL").fetchone()
+            run_id = row[0]
+        if run_id is None:
+            return None, None
+        row = self.db.execute(
+            "SELECT MAX(run_id) FROM runs WHERE finished_at IS NOT NULL AND run_id < ?", (run_id,)
+        ).fetchone()
+        return run_id, row[0]
+
+    def price_history(self, product_id: str, region: Optional[str] = None) -> List[dict]:
+        """
+        Precios de un producto en cada corrida en que apareció, del más viejo al
+        más nuevo (de todas las regiones si no se pide una).
+        """
+        rows = self.db.execute(
+            """SELECT r.started_at, p.region, p.original_price, p.current_price, p.discount_percentage,
+                      p.scrape_method
+               FROM prices p JOIN runs r ON r.run_id = p.run_id
+               WHERE p.product_id = :product_id AND (:region IS NULL OR p.region = :region)
+               ORDER BY p.region, p.run_id""",
+            {"product_id": product_id, "region": region},
+        ).fetchall()
+        keys = ("scraped_at", "region", "original_price", "current_price", "discount_percentage", "scrape_method")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def price_drops(self, run_id: Optional[int] = None) -> List[dict]:
+        """Productos más baratos en `run_id` (por defecto, la última corrida) que en la corrida anterior."""
+        run_id, previous = self.last_runs(run_id)
+        if previous is None:
+            return []
+        rows = self.db.execute(
+            """SELECT p.product_id, p.region, pr.title, old.current_price, p.current_price
+               FROM prices p
+               JOIN prices old ON old.product_id = p.product_id AND old.region = p.region AND old.run_id = ?
+               JOIN products pr ON pr.product_id = p.product_id AND pr.region = p.region
+               WHERE p.run_id = ? AND p.current_price < old.current_price
+               ORDER BY (old.current_price - p.current_price) / old.current_price DESC""",
+            (previous, run_id),
+        ).fetchall()
+        keys = ("product_id", "region", "title", "previous_price", "current_price")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def report_drops(self, run_id: Optional[int] = None, limit: int = 10):
+        drops = self.price_drops(run_id)
+        if not drops:
+            return
+        print(f"\n>>> 📉 {len(drops)} juegos bajaron de precio desde la corrida anterior:")
+        for d in drops[:limit]:
+            print(f"    [{d['region']}] {d['title'][:30]}... ${d['previous_price']:,.2f} -> ${d['current_price']:,.2f}")
+
+    def load_cards(self, region: str = DEFAULT_REGION) -> dict:
+        """product_id -> (hash de la tarjeta, cuándo se parseó de verdad, GameDeal como dict) de una región."""
+        return {
+            pid: (card_hash, parsed_at, json.loads(deal))
+            for pid, card_hash, parsed_at, deal in self.db.execute(
+                "SELECT product_id, card_hash, parsed_at, deal FROM cards WHERE region = ?", (region,)
+            )
+        }
+
+    def save_cards(self, rows: List[Tuple[str, str, str, float, str]]):
+        """Filas (product_id, region, hash, parsed_at, GameDeal en JSON)."""
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self.db.close()
+
+
+class SnapshotSink(DealSink):
+    """Agrega la corrida al SnapshotStore tanda por tanda; el run queda terminado al cerrar."""
+    name = "snapshots"
+
+    def __init__(self, path: str = SNAPSHOT_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.store = SnapshotStore(path)
+        self.run_id = self.store.start_run()
+
+    def write_batch(self, games: List[GameDeal]):
+        self.store.append(self.run_id, games)
+
+    def close(self):
+        super().close()
+        self.store.finish_run(self.run_id)
+        self.store.report_drops(self.run_id)
+        self.store.close()
+
+
+SINK_TYPES = {"sheets": SheetsSink, "jsonl": JsonlSink, "csv": CsvSink, "sqlite": SqliteSink,
+              "snapshots": SnapshotSink}
+SINK_FILES = {"jsonl": "deals.jsonl", "csv": "deals.csv", "sqlite": "deals.sqlite"}
+
+
+def get_sinks(names: str = SINKS, directory: str = SINK_DIR) -> List[DealSink]:
+    """
+    Construye los sinks de una lista separada por comas; los de archivo van a
+    `directory` y "snapshots" usa SNAPSHOT_PATH.
+    """
+    sinks = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        if name not in SINK_TYPES:
+            raise ValueError(f"Sink desconocido: {name!r} (opciones: {', '.join(SINK_TYPES)})")
+        if name == "snapshots":
+            sinks.append(SnapshotSink(SNAPSHOT_PATH or os.path.join(directory, "snapshots.sqlite")))
+        elif name in SINK_FILES:
+            sinks.append(SINK_TYPES[name](os.path.join(directory, SINK_FILES[name])))
+        else:
+            sinks.append(SINK_TYPES[name]())
+    return sinks
+
+# --- 7. Scraper Principal ---
 class MicrosoftStoreScraper:
-    BASE_URL_TEMPLATE = "https://www.microsoft.com/es-ar/store/{filter_mode}/games/pc"
+    BASE_URL_TEMPLATE = STORE_ORIGIN + "/{region}/store/{filter_mode}/games/pc"
     # Añadimos skipItems={} para formato
     
-    def __init__(self, filter_types: List[str]):
+    def __init__(self, filter_types: List[str], deep_concurrency: int = DEEP_CONCURRENCY,
+                 http: Optional[HttpClient] = None, listing_concurrency: int = LISTING_CONCURRENCY,
+                 parser_backend: str = PARSER_BACKEND,
+                 data_source: str = DATA_SOURCE, change_detection: bool = CHANGE_DETECTION,
+                 region: str = DEFAULT_REGION, price_cache: Optional[PriceCache] = None,
+                 parse_workers: int = PARSE_WORKERS, parse_pool: Optional[ProcessPoolExecutor] = None):
         self.filter_types = filter_types
+        self.region = get_region(region)
+        self.parser_backend = parser_backend
+        self.parser = get_parser_backend(parser_backend)
+        # Con pool de parseo (propio o compartido) las páginas llegan ya parseadas como ParsedCard
+        self.parse_workers = parse_workers
+        self.parse_pool = parse_pool
+        if parse_pool is not None or parse_workers > 0:
+            self.parser = ParsedCardParser
+        self.http = http or get_http_client()
+        self.source = get_data_source(data_source, self.parser, self.http, self.region)
+        # Sin price_cache propio se abre el de PRICE_CACHE_PATH en cada corrida
+        self.price_cache = price_cache
+        self.listing_concurrency = listing_concurrency
         self.games: List[GameDeal] = []
         self.scraped_ids = set() 
+        self.deep_concurrency = deep_concurrency
+        # Destino de cada juego con precio final: self.games, o la cola de iter_deals en streaming
+        self._on_deal = self.games.append
+        self._cancelled = threading.Event()
+        # Detección de cambios: tarjetas de la corrida anterior y hashes vistos en esta
+        self.change_detection = change_detection
+        self.known_cards = {}
+        self.card_hashes = {}  # product_id -> (hash, parsed_at)
+        self.card_rows = []
+        self.reused_cards = 0
 
-    def run(self):
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
+    def run(self, sinks: Sequence["DealSink"] = ()):
+        """
+        Sin sinks acumula todo en self.games (para export_to_sheet). Con sinks,
+        cada juego se les entrega apenas tiene precio final y se escribe por
+        tandas mientras sigue el scraping; lo ya volcado sobrevive a un corte.
+        """
+        if not sinks:
+            self._scrape()
+            return
+        try:
+            for game in self.iter_deals():
+                for sink in sinks:
+                    sink.add(game)
+        finally:
+            for sink in sinks:
+                sink.close()
 
-        for category in self.filter_types:
-            print(f"\n>>> 🎮 CATEGORÍA: {category.upper()}")
-            
-            skip = 0
-            while True:
-                target_url = f"{self.BASE_URL_TEMPLATE.format(filter_mode=category)}?skipItems={skip}"
-                print(f"    Scanning Page (Skip {skip})...")
+    def iter_deals(self) -> Iterator[GameDeal]:
+        """Generador: scrapea en un thread aparte y entrega cada GameDeal en cuanto está listo."""
+        deals = queue.Queue(maxsize=STREAM_BUFFER)
+        done = object()
+        self._on_deal = deals.put
+        self._cancelled.clear()
+
+        def produce():
+            try:
+                self._scrape()
+            except Exception as e:
+                print(f"Error crítico en el scraping: {e}")
+            finally:
+                deals.put(done)
 
+        producer = threading.Thread(target=produce, name="scraper", daemon=True)
+        producer.start()
+        try:
+            while (game := deals.get()) is not done:
+                yield game
+        finally:
+            # Si el consumidor cortó antes, frenamos el scraping y vaciamos la cola para no bloquear al productor
+            self._cancelled.set()
+            while producer.is_alive():
                 try:
-                    r = requests.get(target_url, headers=headers)
-                    if r.status_code != 200:
-                        print(f"    Error {r.status_code} - Fin de categoría.")
-                        break
+                    deals.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._on_deal = self.games.append
 
-                    soup = BeautifulSoup(r.text, 'html.parser')
-                    
-                    # Encontrar todas las tarjetas (li con clase col mb-4 px-2)
-                    cards = soup.find_all('li', class_='col mb-4 px-2')
-                    
-                    if not cards:
-                        print("    No se encontraron más juegos.")
-                        break
+    def _scrape(self):
+        card_store = None
+        if self.change_detection:
+            card_store = SnapshotStore(SNAPSHOT_PATH or os.path.join(SINK_DIR, "snapshots.sqlite"))
+            self.known_cards = card_store.load_cards(self.region.code)
+        try:
+            self._scrape_with_pools()
+        finally:
+            if card_store is not None:
+                card_store.save_cards(self.card_rows)
+                card_store.close()
+                print(f"\n>>> ♻ [{self.region.code}] Detección de cambios: {self.reused_cards} tarjetas sin cambios reutilizadas, "
+                      f"{len(self.card_rows) - self.reused_cards} parseadas.")
+
+    def _scrape_with_pools(self):
+        price_cache = self.price_cache
+        if price_cache is None and PRICE_CACHE_PATH:
+            price_cache = PriceCache(PRICE_CACHE_PATH)
+        catalog = None
+        if DEEP_BATCH_LOOKUP:
+            if isinstance(self.source, CatalogDataSource):
+                catalog = self.source.client
+            else:
+                catalog = CatalogClient(self.http, region=self.region)
+        own_parse_pool = None
+        if self.parse_pool is None and self.parse_workers > 0:
+            own_parse_pool = self.parse_pool = start_parse_pool(self.parse_workers)
+        deep_pool = DeepFetchPool(max_workers=self.deep_concurrency, http=self.http,
+                                  price_cache=price_cache, catalog=catalog, region=self.region)
+        try:
+            self._scan_categories(deep_pool)
+            self._resolve_deep(deep_pool)
+        finally:
+            deep_pool.shutdown(cancel=self._cancelled.is_set())
+            if own_parse_pool is not None:
+                own_parse_pool.shutdown()
+                self.parse_pool = None
+
+    def _resolve_deep(self, deep_pool: DeepFetchPool):
+        if not deep_pool.pending or self._cancelled.is_set():
+            return
+        print(f"\n>>> ⏳ Esperando deep fetches: {len(deep_pool.futures)} productos "
+              f"({deep_pool.cache_hits} desde el cache de precios)...")
+        with get_metrics().timer("deep_wait"):
+            ready, failed = deep_pool.drain(wait=True)
+        if deep_pool.catalog is not None:
+            print(f"    {deep_pool.batch_hits} resueltos por lotes en el catálogo, "
+                  f"{len(deep_pool.futures) - deep_pool.cache_hits - deep_pool.batch_hits} desde la ficha de producto.")
+        self._emit_deep(ready, failed)
+
+    def _emit_deep(self, ready: List[GameDeal], failed: List[GameDeal]):
+        """Entrega los Game Pass que ya tienen precio y descarta los que la ficha no pudo resolver."""
+        for game in ready:
+            self._emit(game)
+        if failed:
+            get_metrics().inc("deep_failed", len(failed))
+            for game in failed:
+                self.scraped_ids.discard(game.product_id)
+            print(f"    {len(failed)} juegos Game Pass descartados (sin precio en la ficha).")
+
+    def listing_url(self, category: str, skip: int) -> str:
+        base = self.BASE_URL_TEMPLATE.format(region=self.region.code, filter_mode=category)
+        return f"{base}?skipItems={skip}"
 
-                    new_items_count = 0
-                    for card in cards:
-                        game = GameParser.parse_card(card, category)
-                        
-                        if game and game.product_id not in self.scraped_ids:
-                            self.games.append(game)
-                            self.scraped_ids.add(game.product_id)
-                            new_items_count += 1
-                            
-                            # Log visual
-                            symbol = "💲" if game.scrape_method == 'deep' else "📄"
-                            print(f"    + {symbol} {game.title[:30]}... ${game.current_price:,.2f}")
-
-                    if new_items_count == 0 and skip > 0:
-                        print("    Todos los items de esta página ya estaban scrapeados (o eran gratis).")
-                        # Opcional: break si confiamos en que el orden es estático, 
-                        # pero mejor seguir por si aparecen nuevos más abajo.
-                    
-                    skip += 90 # Microsoft suele paginar de a 90
-                    time.sleep(1) # Pausa amigable
+    @staticmethod
+    def get_total_count(html: str, region: Optional[Region] = None) -> int:
+        """Lee el total de resultados del texto 'Mostrando 1 - 90 de N' (status-container-N)."""
+        region = region or get_region()
+        match = Selectors.STATUS_CONTAINER_RE.search(html)
+        if match:
+            text = Selectors.HTML_TAG_RE.sub(' ', match.group(1))
+            total = region.total_re.search(text)
+            if total:
+                return int(Selectors.NON_DIGIT_RE.sub('', total.group(1)) or 0)
+        return 0
+
+    @staticmethod
+    def page_offsets(total: int) -> List[int]:
+        """Todos los skipItems que faltan después de la página 0."""
+        return list(range(PAGE_SIZE, total, PAGE_SIZE))
 
+    def _scan_categories(self, deep_pool: DeepFetchPool):
+        with ThreadPoolExecutor(max_workers=self.listing_concurrency, thread_name_prefix="listing") as executor:
+            for category in self.filter_types:
+                print(f"\n>>> 🎮 CATEGORÍA: {category.upper()} [{self.region.code}]")
+                try:
+                    self._scan_category(category, deep_pool, executor)
                 except Exception as e:
                     print(f"Error crítico en loop: {e}")
-                    break
+
+    def _scan_category(self, category: str, deep_pool: DeepFetchPool, executor: ThreadPoolExecutor):
+        html = self._fetch_page(category, 0)
+        if html is None:
+            return
+        cards_count, total = self._process_page(category, 0, html, deep_pool)
+        if not cards_count:
+            return
+
+        # Con el total de la página 0 pedimos el resto de las páginas en paralelo
+        skip = PAGE_SIZE
+        offsets = self.page_offsets(total)
+        if offsets:
+            print(f"    Total informado: {total} juegos -> {len(offsets)} páginas más en paralelo")
+            futures = [executor.submit(self._fetch_and_parse, category, offset) for offset in offsets]
+            try:
+                # Se procesan en orden para que la deduplicación no dependa de qué respuesta llegó antes
+                for offset, future in zip(offsets, futures):
+                    html, parsed = future.result()
+                    if html is None:
+                        return
+                    cards_count, _ = self._process_page(category, offset, html, deep_pool, parsed)
+                    if not cards_count:
+                        return
+                    skip = offset + PAGE_SIZE
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        # Fallback: sin total (o si la última página vino llena) seguimos de a una hasta una vacía
+        if total and cards_count < PAGE_SIZE:
+            return
+        while True:
+            html = self._fetch_page(category, skip)
+            if html is None:
+                return
+            cards_count, _ = self._process_page(category, skip, html, deep_pool)
+            if not cards_count:
+                return
+            skip += PAGE_SIZE
+
+    def _fetch_page(self, category: str, skip: int) -> Optional[str]:
+        """Descarga una página del listado. None si falló (fin de categoría) o se canceló el streaming."""
+        if self._cancelled.is_set():
+            return None
+        try:
+            r = self.http.get(self.listing_url(category, skip), cache_ttl=LISTING_CACHE_TTL,
+                              headers=self.region.headers)
+            if r.status_code != 200:
+                print(f"    Error {r.status_code} (Skip {skip}) - Fin de categoría.")
+                return None
+            return r.text
+        except Exception as e:
+            print(f"Error crítico en loop: {e}")
+            return None
+
+    def _start_parse(self, category: str, html: str) -> Optional[Future]:
+        """Etapa de parseo: con PARSE_WORKERS la página se manda a un proceso del pool y se sigue descargando."""
+        if self.parse_pool is None:
+            return None
+        return self.parse_pool.submit(parse_page_in_worker, html, category, self.region.code,
+                                      self.parser_backend, self.change_detection)
+
+    def _fetch_and_parse(self, category: str, skip: int) -> Tuple[Optional[str], Optional[Future]]:
+        html = self._fetch_page(category, skip)
+        return html, self._start_parse(category, html) if html is not None else None
+
+    def _process_page(self, category: str, skip: int, html: str, deep_pool: DeepFetchPool,
+                      parsed: Optional[Future] = None) -> Tuple[int, int]:
+        """
+        Parsea una página del listado y entrega los juegos nuevos; los Game Pass
+        quedan en el pool hasta que su deep fetch termine. `parsed` es el parseo ya
+        encargado al pool de procesos, si lo hay. Devuelve (cantidad de tarjetas, total informado por la página 0).
+        """
+        print(f"    Scanning Page (Skip {skip})...")
+        metrics = get_metrics()
+        total = self.get_total_count(html, self.region) if skip == 0 else 0
+        if self.parse_pool is not None:
+            # El parseo en sí se mide en el worker; acá, lo que se esperó por él
+            with metrics.timer("parse_wait"):
+                cards, worker_metrics = (parsed or self._start_parse(category, html)).result()
+            metrics.merge(worker_metrics)
+        else:
+            with metrics.timer("parse"):
+                cards = self.parser.iter_cards(html)
+        metrics.inc("pages")
+        metrics.inc("cards", len(cards))
+        
+        if not cards:
+            print("    No se encontraron más juegos.")
+            return 0, total
+
+        # Antes de parsear: si el producto ya se scrapeó en otra categoría se saltea sin parsear la tarjeta
+        new_cards = []
+        page_ids = set()
+        new_items_count = reused = 0
+        for card in cards:
+            pid = self.parser.extract_pid(card)
+            if pid in self.scraped_ids or pid in page_ids:
+                continue
+            page_ids.add(pid)
+            game = self._reuse_card(card, pid, category) if self.change_detection and pid else None
+            if game is None:
+                new_cards.append(card)
+                continue
+            self.scraped_ids.add(pid)
+            self._emit(game)
+            reused += 1
+        if reused:
+            metrics.inc("cards_reused", reused)
+            print(f"    ♻ {reused} tarjetas sin cambios desde la corrida anterior")
+        new_items_count += reused
+        self.reused_cards += reused
+
+        for game in self.source.build_deals(new_cards, category, deep_pool):
+            if game and game.product_id not in self.scraped_ids:
+                self.scraped_ids.add(game.product_id)
+                new_items_count += 1
+                
+                # Log visual
+                if game.scrape_method == 'deep':
+                    print(f"    + 💲 {game.title[:30]}... (precio pendiente)")
+                else:
+                    self._emit(game)
+                    symbol = "🧾" if game.scrape_method == 'catalog' else "📄"
+                    print(f"    + {symbol} {game.title[:30]}... ${game.current_price:,.2f}")
+
+        if new_items_count == 0 and skip > 0:
+            print("    Todos los items de esta página ya estaban scrapeados (o eran gratis).")
+            # Opcional: break si confiamos en que el orden es estático, 
+            # pero mejor seguir por si aparecen nuevos más abajo.
+        # Los deep fetch que ya volvieron salen ahora, sin esperar al final de la corrida
+        self._emit_deep(*deep_pool.drain())
+        return len(cards), total
+
+    def _reuse_card(self, card, product_id: str, category: str) -> Optional[GameDeal]:
+        """
+        GameDeal de la corrida anterior si la tarjeta no cambió. Los precios que
+        no salen de la tarjeta (deep/catálogo) se reutilizan hasta CARD_REUSE_TTL.
+        """
+        card_hash = self.parser.card_fingerprint(card)
+        known = self.known_cards.get(product_id)
+        if known and known[0] == card_hash:
+            parsed_at, deal = known[1], known[2]
+            if deal["scrape_method"] == "card" or time.time() - parsed_at < CARD_REUSE_TTL:
+                self.card_hashes[product_id] = (card_hash, parsed_at)
+                return GameDeal(**dict(deal, category_scraped=category))
+        self.card_hashes[product_id] = (card_hash, time.time())
+        return None
+
+    def _emit(self, game: GameDeal):
+        """Entrega un juego con precio final y, con detección de cambios, anota su hash para la próxima corrida."""
+        if game.product_id in self.card_hashes:
+            card_hash, parsed_at = self.card_hashes[game.product_id]
+            self.card_rows.append((game.product_id, game.region, card_hash, parsed_at,
+                                   json.dumps(asdict(game), ensure_ascii=False)))
+        get_metrics().inc("games")
+        self._on_deal(game)
 
     def export_to_sheet(self):
         if not self.games:
@@ -328,43 +2523,365 @@ class MicrosoftStoreScraper:
 
             sh = gc.open_by_key(SPREADSHEET_ID)
             
-            # Preparar datos
-            rows = [[
-                "ID", "Title", "Original Price", "Current Price",
-                "Discount %", "Offer Text", "Es Oferta", 
-                "Categoría", "URL", "Image URL", "Metodo"
-            ]]
-            
             # Ordenar: Primero las ofertas, luego por mayor descuento
             sorted_games = sorted(
                 self.games, 
-                key=lambda x: (x.discount_percentage, x.title), 
+                key=attrgetter("discount_percentage", "title"),
                 reverse=True
             )
+            rows = GameDeal.to_rows(sorted_games)
 
-            for g in sorted_games:
-                rows.append(g.to_csv_row())
+            # Sin clear(): la hoja entera se pisa de una vez y las filas sobrantes de
+            # la corrida anterior se escriben vacías, así nunca queda vacía entre dos llamadas
+            previous_rows = len(sh.values_get(f"'{SHEET_NAME}'!A:A").get("values", []))
+            target = [SHEET_HEADER] + rows
+            target += [[""] * len(SHEET_HEADER)] * (previous_rows - len(target))
 
-            # Escribir en hoja principal
-            ws = sh.worksheet(SHEET_NAME)
-            ws.clear()
-            ws.update(range_name="A1", values=rows)
-            
-            # Actualizar Metadata
-            try:
-                meta = sh.worksheet(META_SHEET)
-                meta.update(range_name="B2", values=[[datetime.now().strftime("%Y-%m-%d %H:%M:%S")]])
-                meta.update(range_name="B3", values=0)
-            except:
-                print("Nota: No se actualizó la hoja _meta (quizás no existe).")
+            # Datos + metadata en un único values.batchUpdate
+            with get_metrics().timer("export"):
+                write_sheet_batch(sh, [{"range": f"'{SHEET_NAME}'!A1", "values": target}])
+            get_metrics().inc("rows_exported", len(rows))
 
             print(f"✔ ÉXITO: {len(self.games)} juegos exportados.")
 
         except Exception as e:
             print(f"Error al exportar a Sheets: {e}")
 
+# --- 8. Motor asyncio ---
+class AsyncMicrosoftStoreScraper(MicrosoftStoreScraper):
+    """
+    Igual que MicrosoftStoreScraper, pero descarga los listados de todas las
+    categorías a la vez en un event loop (con tope de páginas simultáneas por host;
+    el ritmo lo regula el limiter adaptativo del HttpClient).
+    Las páginas se procesan en el mismo orden que el motor secuencial, así que
+    `games` y `scraped_ids` quedan idénticos. Con PARSE_WORKERS, cada página se
+    manda a parsear apenas se descarga, antes de encolarla.
+    """
+
+    def _scan_categories(self, deep_pool: DeepFetchPool):
+        asyncio.run(self._scan_async(deep_pool))
+
+    async def _scan_async(self, deep_pool: DeepFetchPool):
+        host_limits = {}
+        queues = {category: asyncio.Queue() for category in self.filter_types}
+        tasks = [
+            asyncio.create_task(self._fetch_category(category, queues[category], host_limits))
+            for category in self.filter_types
+        ]
+
+        try:
+            # Consumimos en orden de categoría mientras el resto sigue descargando
+            for category in self.filter_types:
+                print(f"\n>>> 🎮 CATEGORÍA: {category.upper()} [{self.region.code}]")
+                while True:
+                    item = await queues[category].get()
+                    if item is None:
+                        break
+                    skip, html, parsed = item
+                    cards_count, _ = await asyncio.to_thread(self._process_page, category, skip, html, deep_pool, parsed)
+                    if not cards_count:
+                        break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_category(self, category: str, queue: asyncio.Queue, host_limits: dict):
+        """Descarga las páginas de una categoría y las encola en orden; None marca el fin."""
+        try:
+            html = await self._fetch_page_async(category, 0, host_limits)
+            if html is None:
+                return
+            await queue.put((0, html, self._start_parse(category, html)))
+            # Conteo barato de tarjetas sobre el HTML crudo; el parseo real lo hace el consumidor
+            cards_count = html.count(Selectors.CARD_MARKER)
+            if not cards_count:
+                return
+
+            skip = PAGE_SIZE
+            total = self.get_total_count(html, self.region)
+            offsets = self.page_offsets(total)
+            if offsets:
+                tasks = [
+                    asyncio.create_task(self._fetch_page_async(category, offset, host_limits))
+                    for offset in offsets
+                ]
+                try:
+                    for offset, task in zip(offsets, tasks):
+                        html = await task
+                        if html is None:
+                            return
+                        await queue.put((offset, html, self._start_parse(category, html)))
+                        cards_count = html.count(Selectors.CARD_MARKER)
+                        if not cards_count:
+                            return
+                        skip = offset + PAGE_SIZE
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Fallback: sin total (o si la última página vino llena) seguimos de a una
+            if total and cards_count < PAGE_SIZE:
+                return
+            while True:
+                html = await self._fetch_page_async(category, skip, host_limits)
+                if html is None:
+                    return
+                await queue.put((skip, html, self._start_parse(category, html)))
+                if Selectors.CARD_MARKER not in html:
+                    return
+                skip += PAGE_SIZE
+        except Exception as e:
+            print(f"Error crítico en loop ({category}): {e}")
+        finally:
+            await queue.put(None)
+
+    async def _fetch_page_async(self, category: str, skip: int, host_limits: dict) -> Optional[str]:
+        if self._cancelled.is_set():
+            return None
+        target_url = self.listing_url(category, skip)
+        host = urlparse(target_url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.listing_concurrency)
+
+        async with host_limits[host]:
+            r = await asyncio.to_thread(self.http.get, target_url, cache_ttl=LISTING_CACHE_TTL,
+                                        headers=self.region.headers)
+
+        if r.status_code != 200:
+            print(f"    [{category}] Error {r.status_code} (Skip {skip}) - Fin de categoría.")
+            return None
+        return r.text
+
+# --- 9. Varias regiones en una corrida ---
+class MultiRegionScraper:
+    """
+    Un scraper por región corriendo en paralelo (cada uno en su thread) sobre el
+    mismo HttpClient, así comparten el pool de conexiones y el cache HTTP, y con
+    un único PriceCache. Cada región deduplica sus propios product_id.
+    """
+
+    def __init__(self, filter_types: List[str], regions: List[str], scraper_class=MicrosoftStoreScraper, **kwargs):
+        self.price_cache = PriceCache(PRICE_CACHE_PATH) if PRICE_CACHE_PATH else None
+        # Un único pool de parseo para todas las regiones, lanzado antes que sus threads
+        parse_workers = kwargs.pop("parse_workers", PARSE_WORKERS)
+        self.parse_pool = start_parse_pool(parse_workers) if parse_workers > 0 else None
+        self.scrapers = [
+            scraper_class(filter_types, region=region, price_cache=self.price_cache, parse_workers=parse_workers,
+                          parse_pool=self.parse_pool, **kwargs)
+            for region in regions
+        ]
+        self.games: List[GameDeal] = []
+
+    def run(self, sinks: Sequence["DealSink"] = ()):
+        if not sinks:
+            try:
+                with ThreadPoolExecutor(max_workers=len(self.scrapers), thread_name_prefix="region") as executor:
+                    list(executor.map(lambda scraper: scraper.run(), self.scrapers))
+            finally:
+                self.shutdown()
+            for scraper in self.scrapers:
+                self.games.extend(scraper.games)
+                print(f"    [{scraper.region.code}] {len(scraper.games)} juegos")
+            return
+        try:
+            for game in self.iter_deals():
+                for sink in sinks:
+                    sink.add(game)
+        finally:
+            for sink in sinks:
+                sink.close()
+
+    def iter_deals(self) -> Iterator[GameDeal]:
+        """Mezcla los streams de todas las regiones a medida que llegan."""
+        deals = queue.Queue(maxsize=STREAM_BUFFER)
+        done = object()
+
+        def pump(scraper):
+            try:
+                for game in scraper.iter_deals():
+                    deals.put(game)
+            finally:
+                deals.put(done)
+
+        threads = [threading.Thread(target=pump, args=(scraper,), name=f"region-{scraper.region.code}", daemon=True)
+                   for scraper in self.scrapers]
+        for thread in threads:
+            thread.start()
+        remaining = len(threads)
+        try:
+            while remaining:
+                game = deals.get()
+                if game is done:
+                    remaining -= 1
+                    continue
+                yield game
+        finally:
+            for scraper in self.scrapers:
+                scraper._cancelled.set()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    deals.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.shutdown()
+
+    def shutdown(self):
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown()
+
+    # El export solo usa self.games, así que sirve el mismo
+    export_to_sheet = MicrosoftStoreScraper.export_to_sheet
+
+# --- 10. Fixtures reales para verificar el parseo ---
+def capture_fixtures(directory: str, categories: List[str], regions: List[str],
+                     http: Optional[HttpClient] = None) -> List[str]:
+    """
+    Guarda en `directory` la primera página de listado de cada categoría y región
+    tal como la sirve la Store (listing-<región>-<categoría>.html) y, por región,
+    la respuesta del Display Catalog para los IDs de la primera página, con los
+    Game Pass primero (catalog-<región>.json). Son la entrada de --verify-parsers
+    y --verify-catalog. Devuelve los archivos escritos.
+    """
+    http = http or get_http_client()
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    def save(name: str, text: str):
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"💾 {path}")
+        paths.append(path)
+
+    for code in regions:
+        region = get_region(code)
+        first_page = None
+        for category in categories:
+            url = MicrosoftStoreScraper.BASE_URL_TEMPLATE.format(region=code, filter_mode=category) + "?skipItems=0"
+            r = http.get(url, headers=region.headers)
+            if r.status_code != 200:
+                print(f"❌ {url}: error {r.status_code}")
+                continue
+            save(f"listing-{code}-{category}.html", r.text)
+            first_page = first_page or r.text
+        if first_page is None:
+            continue
+
+        game_pass = _CollectDeep()
+        cards = GameParser.iter_cards(first_page)
+        for card in cards:
+            GameParser.parse_card(card, "fixture", game_pass, region=region)
+        pids = [g.product_id for g in game_pass.games]
+        pids += [pid for pid in map(GameParser.extract_pid, cards) if pid and pid not in pids]
+        r = http.get(CatalogClient(http, region=region).batch_url(pids[:CATALOG_BATCH_SIZE]), headers=region.headers)
+        if r.status_code != 200:
+            print(f"❌ Catálogo [{code}]: error {r.status_code}")
+            continue
+        save(f"catalog-{code}.json", r.text)
+    return paths
+
+
+def verify_catalog_fixtures(paths: List[str]) -> bool:
+    """
+    Corre CatalogParser sobre respuestas guardadas del Display Catalog (archivos,
+    o los catalog-*.json de un directorio). Si junto a la respuesta hay un
+    <nombre>.expected.json ({product_id: {"best_price": [MSRP, ListPrice] | null,
+    "deal": {campo: valor} | null}}), cada producto tiene que dar exactamente eso;
+    si no, alcanza con que al menos uno salga con precio.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(p for p in glob.glob(os.path.join(path, "catalog-*.json"))
+                            if not p.endswith(".expected.json"))
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            print(f"⚠ {path}: no existe, se saltea")
+    if not files:
+        print(f"❌ No hay respuestas del catálogo en {', '.join(paths)} (se graban con --capture-fixtures)")
+        return False
+
+    all_ok = True
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            products = json.load(f).get("Products", [])
+        match = re.match(r"catalog-([a-z]{2}-[a-z]{2})", os.path.basename(path))
+        region = match.group(1) if match and match.group(1) in REGION_SETTINGS else DEFAULT_REGION
+        results = {}
+        for product in products:
+            prices = CatalogParser.best_price(product)
+            deal = CatalogParser.parse_product(product, "fixture", "", region)
+            results[product.get("ProductId")] = (list(prices) if prices else None, deal)
+
+        expected_path = path[:-len(".json")] + ".expected.json"
+        if not os.path.exists(expected_path):
+            priced = sum(1 for prices, _ in results.values() if prices)
+            ok = priced > 0
+            print(f"{'✔' if ok else '❌'} {path}: {priced} de {len(products)} productos con precio de compra")
+            all_ok &= ok
+            continue
+
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        errors = []
+        for product_id, want in expected.items():
+            if product_id not in results:
+                errors.append(f"{product_id}: no está en la respuesta")
+                continue
+            prices, deal = results[product_id]
+            if prices != want["best_price"]:
+                errors.append(f"{product_id}: best_price {prices} (esperado {want['best_price']})")
+            if want["deal"] is None or deal is None:
+                if (want["deal"] is None) != (deal is None):
+                    errors.append(f"{product_id}: parse_product {deal} (esperado {want['deal']})")
+                continue
+            got = asdict(deal)
+            errors += [f"{product_id}: {key} = {got[key]!r} (esperado {value!r})"
+                       for key, value in want["deal"].items() if got[key] != value]
+        if errors:
+            all_ok = False
+            print(f"❌ {path}:")
+            for error in errors:
+                print(f"    {error}")
+        else:
+            print(f"✔ {path}: {len(expected)} productos como se esperaba")
+    return all_ok
+
 # --- Ejecución ---
 if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Scraper de ofertas de juegos de PC en la Microsoft Store")
+    cli.add_argument("--verify-parsers", nargs="*", metavar="HTML",
+                     help="compara los backends de parseo sobre páginas de listado guardadas "
+                          f"(archivos o directorios; por defecto {FIXTURES_DIR}) y sale")
+    cli.add_argument("--verify-catalog", nargs="*", metavar="JSON",
+                     help="corre CatalogParser sobre respuestas guardadas del Display Catalog "
+                          f"(archivos o directorios; por defecto {FIXTURES_DIR}) y sale")
+    cli.add_argument("--capture-fixtures", nargs="?", const=FIXTURES_DIR, metavar="DIR",
+                     help="guarda páginas de listado y respuestas del catálogo reales para "
+                          "--verify-parsers/--verify-catalog y sale")
+    cli.add_argument("--history", metavar="PRODUCT_ID",
+                     help="muestra el historial de precios guardado de un producto y sale")
+    cli.add_argument("--drops", action="store_true",
+                     help="lista los juegos que bajaron de precio en la última corrida y sale")
+    args = cli.parse_args()
+    if args.verify_parsers is not None:
+        raise SystemExit(0 if verify_parser_backends(args.verify_parsers or [FIXTURES_DIR]) else 1)
+    if args.verify_catalog is not None:
+        raise SystemExit(0 if verify_catalog_fixtures(args.verify_catalog or [FIXTURES_DIR]) else 1)
+    if args.history or args.drops:
+        store = SnapshotStore(SNAPSHOT_PATH)
+        if args.history:
+            for entry in store.price_history(args.history):
+                print(f"{entry['scraped_at']}  [{entry['region']}] ${entry['original_price']:,.2f} -> ${entry['current_price']:,.2f} "
+                      f"({entry['scrape_method']})")
+        if args.drops:
+            store.report_drops(limit=1000)
+        store.close()
+        raise SystemExit(0)
+
     # Las categorías que pediste
     categories = [
         "top-paid",
@@ -373,7 +2890,24 @@ if __name__ == "__main__":
         "new-and-rising",
         "deals"
     ]
+    regions = [code.strip() for code in REGIONS.split(",") if code.strip()]
+    if args.capture_fixtures:
+        captured = capture_fixtures(args.capture_fixtures, categories, regions)
+        get_http_client().close()
+        raise SystemExit(0 if captured else 1)
     
-    scraper = MicrosoftStoreScraper(filter_types=categories)
-    scraper.run()
-    scraper.export_to_sheet()
\ No newline at end of file
+    scraper_class = AsyncMicrosoftStoreScraper if SCRAPER_ENGINE == "async" else MicrosoftStoreScraper
+    if len(regions) > 1:
+        scraper = MultiRegionScraper(categories, regions, scraper_class)
+    else:
+        scraper = scraper_class(filter_types=categories, region=regions[0])
+    sinks = get_sinks(SINKS)
+    scraper.run(sinks)
+    if not sinks:
+        scraper.export_to_sheet()
+        if SNAPSHOT_PATH and scraper.games:
+            store = SnapshotStore(SNAPSHOT_PATH)
+            store.report_drops(store.record_run(scraper.games))
+            store.close()
+    get_http_client().close()
+    get_metrics().write()
\ No newline at end of file